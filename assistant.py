@@ -0,0 +1,483 @@
+"""Retrieval, prompt building, model calls and support email for AdigyAssist.
+
+Nothing here depends on Streamlit, so the same code serves the chat UI in
+app.py, scripts and the benchmarks. Configuration is read from the
+environment (and .env) when the module is first imported.
+"""
+import os
+import requests
+import json
+from dotenv import load_dotenv
+import re
+import hashlib
+import sqlite3
+import logging
+import time
+from urllib.parse import urlsplit
+from faq_matcher import MATCH_STATS
+from faq_store import FaqSnapshot, get_faq_store
+from http_client import NO_RETRY, TIMEOUTS, get_http_client, is_timeout
+from metrics import REGISTRY, STAGE_SECONDS, span, start_exporters
+from outbox import get_email_outbox
+from prompt_builder import NO_CONTEXT, get_prompt_builder
+from response_cache import cache_key, get_response_cache
+from singleflight import get_singleflight
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+BREVO_API_KEY = os.getenv("BREVO_API_KEY")
+MODEL_URL = os.getenv("MODEL_URL", "https://api-inference.huggingface.co/models/mistralai/Mistral-7B-Instruct-v0.2")
+HUGGINGFACE_HEADERS = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": "application/json"}
+BREVO_URL = os.getenv("BREVO_URL", "https://api.brevo.com/v3/smtp/email")
+BREVO_HEADERS = {"api-key": BREVO_API_KEY, "Content-Type": "application/json"}
+MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "8"))
+BREVO_MAX_CONCURRENCY = int(os.getenv("BREVO_MAX_CONCURRENCY", "4"))
+FAQ_PATH = os.getenv("FAQ_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "faq_data.json"))
+SUPPORT_OUTBOX_PATH = os.getenv("SUPPORT_OUTBOX_PATH", "support_outbox.db")
+FAQ_DIRECT_THRESHOLD = float(os.getenv("FAQ_DIRECT_THRESHOLD", "0.8"))
+FAQ_DIRECT_MARGIN = float(os.getenv("FAQ_DIRECT_MARGIN", "0.1"))
+FAQ_CONTEXT_ENTRIES = int(os.getenv("FAQ_CONTEXT_ENTRIES", "3"))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2048"))
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER")
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# Built-in FAQ used when faq_data.json is missing
+DEFAULT_FAQ_DATA = {
+    "what is adigy": "Adigy (formerly Adsology) is an automated Amazon ads management software designed for Kindle Direct Publishing (KDP) publishers—those who self-publish books on Amazon. It optimizes Amazon advertising campaigns to improve performance and returns by adjusting bids, targeting, and budgets, making it especially useful for publishers with lower ad spend (e.g., under $2,000/month) or beginners new to Amazon ads.",
+    "difference between adigy and adsdroid": "Adigy is a self-service software tool for publishers with lower ad spend or beginners, automating campaign management. AdsDroid is a premium 'done-for-you' agency service for advanced publishers with higher ad spend (e.g., over $5,000/month), providing a dedicated account manager for personalized monitoring and customization, offering more hands-on support than Adigy’s automated platform.",
+    "why transition to adigy": "Adsology is rebranding to Adigy to reflect platform evolution and service enhancements. Your account functionality (e.g., campaign settings, budgets) remains identical; only the name changes to Adigy, aligning with our growth strategy.",
+    "fiction or non-fiction": "Adigy supports both fiction and non-fiction books with tailored strategies. Fiction benefits from category and product targeting (e.g., ads on similar books), while non-fiction excels with keyword-focused campaigns (e.g., targeting search terms), adapting to each genre’s advertising strengths.",
+    "cost": "Adigy costs $249/month, plus a 3.3% fee on ad spend over $2,000 (e.g., $33 for $1,000 extra spend). No free trial is offered, but a 30-day money-back guarantee applies. An affiliate program at https://Adigy.ai/partner provides 25% lifetime commissions.",
+    "roi": "Return on investment (ROI) varies by book and category. Most see Advertising Cost of Sale (ACOS—ad spend divided by sales revenue) improve in 3-4 weeks as Adigy gathers data, with optimal results by month 3. New books with few reviews (under 5) take longer due to ranking and visibility challenges—often 4-6 months.",
+    "free trial": "No free trial exists for Adigy, but a 30-day money-back guarantee ensures satisfaction. If unhappy within 30 days of subscribing, contact support for a full refund.",
+    "money-back guarantee": "Yes, Adigy offers a 30-day money-back guarantee. If unsatisfied for any reason within 30 days of subscribing, email example@email.com for a full refund, no questions asked.",
+    "cancel subscription": "Canceling keeps your subscription active until the billing period ends (e.g., 20 days left). To stop ads immediately: 1. Pause campaigns manually in the Amazon Ads console, 2. Click 'Master Undo' in Adigy to revert to pre-Adigy settings, 3. Set marketplaces to 'Off' in Adigy settings. See 'ads still running' for related info.",
+    "affiliate program": "Join at https://Adigy.ai/partner for 25% lifetime commissions on referrals’ subscriptions (e.g., $62.25/month per referral). Referring 4 people covers your $249/month fee, effectively making it free.",
+    "setup": "To set up Adigy: connect your Amazon KDP account via 'Login with Amazon,' install the free Chrome extension, select books to manage in the dashboard, and set marketplace budgets (e.g., US, UK) at Adigy.ai. No forms or calls needed—start by clicking 'Start Today.' Requires editor access (see 'editor access').",
+    "sync time": "Initial syncing takes under 1 hour typically, but up to 6 hours for very large accounts (e.g., 100+ books) or if Amazon’s servers are slow. Delays are rare but possible during high-traffic periods like holidays.",
+    "us marketplace connect": "US marketplace connection issues are usually temporary authentication errors. Log out of Amazon and Adigy, clear browser cache, then log back in. If it persists (e.g., after 2 tries), email example@email.com with screenshots of the error.",
+    "sync stuck": "If syncing stalls, refresh the page (could be a UI glitch). If unresolved, clear cache/cookies, re-login to Amazon in Chrome with the Adigy extension, or switch browsers (Chrome recommended). Persistent issues (e.g., over 6 hours) require support contact—see 'support.'",
+    "chrome extension": "Yes, the Chrome extension is required. It syncs Kindle Direct Publishing (KDP) royalty data into Adigy, merging it with ad spend to calculate net profitability (e.g., profit after ad costs), essential for performance insights.",
+    "other browsers": "The Adigy extension works only with Google Chrome and may fail on Safari, Brave, Edge, etc., due to compatibility. Use Chrome for optimal syncing and functionality.",
+    "permissions": "Adigy needs access to your Amazon KDP account (for royalties) and Amazon Advertising account (for ads), requiring editor access during onboarding (see 'editor access'). You must accept Amazon’s ad terms and add billing details in your Amazon account.",
+    "editor access": "Grant editor access: 1. Visit https://advertising.amazon.com/user/management/invite, 2. Enter Adigy@Adigy.ai, 3. Choose 'Editor' permission, 4. Click 'Select all' for Country Access (e.g., US, UK), 5. Hit 'Invite users.' This allows Adigy to manage campaigns.",
+    "not eligible books": "Books marked 'not eligible' or 'out of stock' despite availability stem from Amazon API limits or data glitches (e.g., stock updates lagging). If confirmed active on Amazon, contact example@email.com with ASINs (e.g., B0DD86533Y) for a manual fix.",
+    "duplicate listings": "Duplicates arise from multiple formats (paperback, hardcover, Kindle) of the same book. Adigy groups them for management ease. If confused (e.g., same ASIN twice), contact support with specific ASINs for clarification.",
+    "email notifications": "Hundreds of Amazon emails are normal at Adigy startup due to campaign creation/update notices. Reduce via Amazon Ads console notification settings or email filters to auto-delete (e.g., filter 'Amazon Advertising'). See 'stop emails.'",
+    "set budget": "Set monthly budgets per marketplace (e.g., $500 for US, £200 for UK) in Adigy’s Marketplace and Budget dashboard section. This covers all campaigns/books in that marketplace, adjustable anytime.",
+    "minimum budget": "The minimum budget is 100 units per marketplace in its currency (e.g., $100 USD, £100 GBP, €100 EUR), ensuring basic campaign operation.",
+    "recommended budget": "Start at $100/marketplace minimum, but $500-$1,000 per marketplace is recommended for effective results, especially with multiple books or high visibility goals, enabling broader targeting and faster optimization.",
+    "budget per book": "Budgets are set per marketplace (e.g., US, UK), not per book or account-wide. Each marketplace operates independently—e.g., $500 US budget covers all US books.",
+    "individual book budgets": "No per-book budgets exist; control is at the marketplace level. Limit spend by pausing a book in specific marketplaces (e.g., UK off) or restricting formats (e.g., paperback only—see 'specific formats').",
+    "stay within budget": "Yes, Adigy ensures ad spend stays within your set budget by adjusting bids and prioritizing high-performing targets, preventing overspending even with multiple campaigns.",
+    "low ad spend": "Lower-than-set spend is normal early on as Adigy conservatively tests keywords/ASINs. Spend rises as profitable targets emerge (e.g., after 2 weeks). It also drops during low-demand times (e.g., post-Christmas) to save costs.",
+    "allocate budget": "Typically allocate 60-70% to the US (highest sales volume), 20-25% to UK/CA, and 5-10% to others (e.g., DE, AU), adjusting based on your books’ audience (e.g., UK-heavy for British fiction).",
+    "ad cost in fee": "No, the $249/month fee is for Adigy software access only. Amazon bills ad spend separately via your Advertising account (e.g., $300 ad spend = $300 Amazon charge).",
+    "budget allocation": "Adigy dynamically allocates budget to top-performing targets (keywords/ASINs) using an algorithm factoring historical performance, ACOS, and conversion rates, optimizing across all campaigns daily.",
+    "spend fluctuations": "Daily spend shifts are normal due to: 1. Bid adjustments from performance data, 2. Seasonal competition (e.g., holiday spikes), 3. Conversion changes (e.g., new reviews), 4. Amazon auction dynamics. Balances out monthly.",
+    "holiday budget": "Adigy adjusts for Christmas: reduces spend in the last week of December (low conversions) and boosts weeks 2-3 (high demand), optimizing holiday performance automatically.",
+    "existing campaigns": "Adigy integrates with your Amazon Ads account, taking over existing campaigns for managed books, optimizing bids and budgets for better performance (e.g., lowering ACOS).",
+    "new campaigns": "Adigy auto-creates campaigns: Auto (product/keyword discovery), Broad (research), Product Targeting (competitor sales), Brand Defense (protect brand), Gold Panning (low CPC sniping—see 'gold panning') to expand reach.",
+    "many campaigns": "Multiple campaigns, especially Gold Panning, launch at start for keyword discovery and optimization, respecting your budget to avoid overspending (e.g., $500 cap holds).",
+    "campaign naming": "Names use: Book Abbreviation-Ad Type-Purpose-ASIN-Format-ID (e.g., TI1E-SP-GP-B0DD86533Y-Paperback-ZPOMTS). 'TI1E' is title, 'SP' is Sponsored Products, 'GP' is Gold Panning, aiding tracking.",
+    "specific formats": "Yes, choose formats (paperback, Kindle, hardcover) to advertise per book on its Adigy page with toggles—e.g., paperback only, Kindle off.",
+    "stop formats": "Pause formats (e.g., Kindle, hardcover) on the book’s Adigy detail page using pause buttons next to each format, stopping their ads instantly.",
+    "top 10 targets": "Top 10 Targets let you pick up to 10 keywords and 10 ASINs (20 total) per book as priority ad focuses. Add via Adigy to direct budget and boost promotion—e.g., 'fantasy novel' or competitor ASIN.",
+    "more than 10 targets": "You can exceed 10 Top Targets, but we suggest 10 highly relevant keywords/ASINs for focused ads (e.g., avoid diluting with 20+ vague terms).",
+    "exact negatives": "Exact Negatives block only the exact term—e.g., 'dog training book' stops that phrase but not 'dog training books,' saving spend on irrelevant clicks.",
+    "phrase negatives": "Phrase Negatives block any term with the phrase—e.g., 'dog training' stops 'dog training books,' 'best dog training,' cutting unprofitable searches.",
+    "blockers in opportunities": "Relevant targets may be blockers in Opportunities if they underperform (e.g., high ACOS, 50 clicks/no sales). Unblock if you think they’re key; Adigy uses past data, but you override.",
+    "gold panning": "Gold Panning (GP) campaigns target low-bid ad slots with: broad match keywords (generic, e.g., 'book'), low bids (~$0.11), research goal (find cheap conversions), low ACOS (~19%), safety (low risk), high keyword volume, no manual tweaks, hidden UI to reduce clutter.",
+    "turn off gold panning": "Disable Gold Panning in Adigy’s Advanced settings if you don’t want this low-bid research strategy—e.g., preferring direct sales focus.",
+    "random keywords": "Unusual/random keywords in Gold Panning (e.g., 'gift') are for research, seeking profitable, less obvious terms. They’re intentional, not errors.",
+    "edit in amazon": "You can edit campaigns in Amazon Ads Console, but minimal changes are best. Frequent manual bid/budget/target edits disrupt Adigy’s learning (e.g., 2-3 weeks needed), risking poorer results.",
+    "new book": "New books auto-appear in Unmanaged. Toggle Adigy ON, pick formats/markets, and it crafts campaigns per budget/book traits. Books under 2 months get launch mode—see 'new book launches.'",
+    "video ads": "Adigy manages existing Sponsored Brands Video Ads, prioritizing exposure, but you must create them manually in Amazon Ads console—e.g., upload a 30-second book trailer.",
+    "ad types": "Adigy focuses on Sponsored Products (best for KDP) and manages manually created Sponsored Brands Product Collection and Video ads—e.g., a video ad you set up.",
+    "multiple marketplaces": "Adigy optimizes across 11 KDP marketplaces (US, UK, CA, AU, DE, FR, IT, ES, NL, MX, IN) with separate budgets/campaigns—e.g., $500 US, £200 UK.",
+    "bid adjustments": "Adigy updates bids/budgets up to 6x/day (large accounts) or daily (small accounts), acting as a 'set it and forget it' tool for ongoing optimization.",
+    "manage specific books": "Yes, pick which books Adigy manages in the dashboard, leaving others unmanaged—e.g., advertise only 3 of 10 titles.",
+    "rename campaigns": "Rename Adigy campaigns in Amazon Ads console (e.g., 'TI1E-SP' to 'Fantasy-SP') for organization; it doesn’t affect Adigy’s management.",
+    "stop emails": "Cut Amazon Ads email volume by tweaking notification settings in the platform (e.g., uncheck 'campaign updates') or using email filters to archive/delete—e.g., filter 'Amazon Advertising.'",
+    "results time": "Some see results in days, but 2-3 weeks is typical for noticeable improvements as data builds. Full optimization takes ~3 months, longer for new books (e.g., 4-6 months).",
+    "metrics": "Adigy optimizes for break-even ACOS (ad spend/sales revenue), adjusting bids/budgets to align ad costs with royalties—e.g., targeting 30% ACOS for Kindle.",
+    "high acos initially": "High ACOS in the first 2-3 weeks is expected during discovery as Adigy tests keywords/targets—e.g., 80% ACOS dropping to 40% after optimization.",
+    "reviews needed": "Effective ads need: 5-10 reviews (minimum), 15+ (good), 30+ (strong), 50-100+ (ideal for max conversions). Under 5 reviews means higher ACOS and fewer campaign options.",
+    "high acos popular category": "High ACOS in a popular category signals conversion issues. Check: 1. Cover quality/professionalism, 2. Description clarity/appeal, 3. Review count/quality, 4. Category fit, 5. Pricing (competitive/discounts), 6. A+ content quality, 7. Sample quality, 8. Best seller badge, 9. Bonuses (e.g., freebies), 10. 5+ UGC videos (US only). See 'improve performance.'",
+    "improve performance": "Boost ads by: getting 10-50+ reviews, optimizing description (benefit-driven), enhancing A+ content (visuals/info), ensuring pro cover, picking relevant targets/keywords, adding negatives (see 'add negatives'), refining categories—e.g., switch to narrower niche.",
+    "seasonal books": "For seasonal books: 1. Start ads 4-6 weeks pre-peak (e.g., Halloween by September), 2. Raise budget 2 months before, 3. Add seasonal Top 10 Targets (e.g., 'Christmas gift'), 4. Pause post-season. Adigy adjusts bids for patterns.",
+    "seasonal peaks": "Yes, Adigy adapts to peaks like Q4 (Oct-Dec), tweaking budgets/bids to maximize sales—e.g., higher bids in November, lower in late December.",
+    "good acos": "Good ACOS by format: Paperbacks (25-45% break-even), Kindle (30-70% per price, e.g., $2.99 vs. $9.99), Hardcovers (20-30%). Launches may hit 100%+ for visibility; aim below break-even for established books.",
+    "target acos": "Adigy targets break-even ACOS (e.g., 30% for Kindle) to balance spend/royalties. For new launches, it allows higher ACOS (e.g., 80%) for visibility/ranking—see 'new book launches.'",
+    "bid changes": "Frequent bid shifts optimize based on performance/market—e.g., upping bids on 'fantasy novel' (10 sales) and cutting 'book' (no sales)—maximizing ROI daily.",
+    "low bids good keywords": "Low bids on low-ACOS keywords are strategic, balancing budget, relevance, and goals—e.g., testing new terms or spreading funds across campaigns.",
+    "new book launches": "Adigy detects new books (<2 months) and uses launch mode, aggressively bidding/allocating budget for visibility/sales velocity—e.g., 100% ACOS to boost rankings initially.",
+    "negative keywords": "Adigy’s AI auto-adds negative keywords from performance data—e.g., 'free book' if it wastes spend—reducing irrelevant clicks.",
+    "add negatives": "Manually add negatives in Adigy’s 'Negatives' tab. Click Add Negatives, review suggestions (e.g., 'dog training'), and add to keyword/ASIN lists—e.g., block competitor ASIN B012345678.",
+    "low budgets": "Low budgets (e.g., $1.01/day) mark underperforming/lower-priority campaigns, focusing spend on better targets—e.g., a keyword with no sales after 100 clicks.",
+    "ineligible book": "'Ineligible' means Amazon Ads blocks new campaigns for that book (e.g., policy or stock issues). Adigy may still manage existing ones—check with support.",
+    "account suspended": "Adigy doesn’t cause suspensions; it’s an Amazon Ads partner following policies. Causes: 1. Prohibited content (e.g., banned genres), 2. Odd activity (e.g., rapid changes), 3. Violations. Contact Amazon Ads support; pause Adigy—see 'suspension.'",
+    "suspension": "For suspension/termination, pause Adigy subscription immediately. Contact Amazon Ads support to fix; Adigy support (example@email.com) guides but can’t intervene—e.g., can’t lift bans.",
+    "policy violations": "Adigy adheres to Amazon rules. For violations (e.g., ad content flags), resolve with Amazon directly; Adigy support clarifies software use but can’t fix—e.g., explain bid adjustments.",
+    "book details change": "Yes, changes affect ads: 1. Better covers/descriptions lift conversions (e.g., 2% to 5%), 2. Price shifts alter margins/competitiveness, 3. Category changes shift visibility. Adigy adapts with new data over weeks.",
+    "support": "Get help by replying to example@email.com emails or using the website form. For urgent issues (e.g., sync failure), book a call via the link in support emails—expect 24-48 hour replies.",
+    "ads still running": "Post-cancellation, ads run until billing ends (e.g., 15 days left). Stop by: 1. Pausing in Amazon Ads console, 2. Using 'Master Undo' to revert, 3. Setting marketplaces 'Off' in Adigy—see 'cancel subscription.'",
+    "cancel refund": "Cancel in 'Account Settings' on the Adigy dashboard (follow prompts). For refunds within 30 days, email example@email.com per the guarantee—e.g., 'Refund request, subscribed March 1.'",
+    "extension sync": "Fix extension sync issues: 1. Refresh page, 2. Clear cache/cookies, 3. Confirm Chrome (others unsupported), 4. Reinstall extension, 5. Ensure KDP login in same browser, 6. Wait 20-30 min (server lag). If stuck, send screenshots to example@email.com.",
+    "pause advertising": "Pause ads for books or marketplaces in the Adigy dashboard—e.g., toggle US off or pause a paperback—stopping spend instantly.",
+    "payment fails": "Failed payments may pause your Adigy account until billing updates and succeeds—e.g., card expired, retry with new card in dashboard.",
+    "incorrect sales data": "Sales discrepancies come from: 1. Sync delays (KDP/Ads/Adigy, e.g., 24-hour lag), 2. KENP (Kindle page reads) counting diffs, 3. Returns/cancellations, 4. Currency conversions (e.g., £ to $). Use weekly/monthly data for accuracy."
+}
+
+SYSTEM_PROMPT = """
+You are a 10x developer assisstant, mentoring the user in their programming journey. Answer user queries concisely and accurately in plaintext, using bullet points or numbered lists only when necessary for clarity. Do not repeat the query, conversation history, or input structure in your response — provide only the answer. Prioritize accurate information above all. Try to layout the answer in a nice way to improve readability where possible. Ignore the provided FAQ_DATA, that was for a different project. Dont give information about Adigy
+"""
+
+# Parsed and indexed once per process, reloaded in the background when the file changes
+FAQ_STORE = get_faq_store(FAQ_PATH, fallback=DEFAULT_FAQ_DATA)
+
+def relevant_snippets(query, faq, top_k=FAQ_CONTEXT_ENTRIES):
+    with span("faq_retrieval"):
+        exact_match = faq.index.exact_match(query)
+        if exact_match is not None:
+            return [exact_match]
+        return [value for _, value, _ in faq.search(query, k=top_k)]
+
+def extract_relevant_info(query, faq_data=None, top_k=2):
+    # Searches the live FAQ by default; a plain dict, as callers passed before the
+    # store existed, is indexed on the spot
+    if faq_data is None:
+        faq = FAQ_STORE.current()
+    elif isinstance(faq_data, dict):
+        faq = FaqSnapshot(faq_data)
+    else:
+        faq = faq_data
+    snippets = relevant_snippets(query, faq, top_k)
+    if snippets:
+        return " ".join(snippets)
+    return NO_CONTEXT
+
+ANSWER_MARKER = "Assistant:"
+HEADER_PREFIXES = ("Below is the relevant information", "Conversation History", "Latest User Query")
+HEADER_RE = re.compile("(?:" + "|".join(HEADER_PREFIXES) + ").*?:\n", flags=re.DOTALL)
+HEADER_START_RE = re.compile("|".join(HEADER_PREFIXES))
+
+class ResponseCleaner:
+    # Strips echoed prompt sections from generated text as it streams in, holding
+    # back only the tail that could still turn out to be part of a marker. Once a
+    # prompt header shows up, the echoed turns after it are held until the answer
+    # marker, since anything shown can't be taken back.
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+        self._echo = False
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        return self._drain(final=False)
+
+    def flush(self):
+        return self._drain(final=True)
+
+    def _drain(self, final):
+        text = self._buffer
+        marker_at = text.rfind(ANSWER_MARKER)
+        if marker_at != -1:
+            text = text[marker_at + len(ANSWER_MARKER):]
+            self._echo = False
+        if HEADER_START_RE.search(text):
+            self._echo = True
+        text = HEADER_RE.sub("", text)
+
+        keep = len(text)
+        if not final:
+            keep = 0 if self._echo else len(text.rstrip())
+            for marker in (ANSWER_MARKER,) + HEADER_PREFIXES:
+                for size in range(min(len(marker) - 1, keep), 0, -1):
+                    if text[:keep].endswith(marker[:size]):
+                        keep -= size
+                        break
+
+        emitted, self._buffer = text[:keep], text[keep:]
+        if not self._started:
+            emitted = emitted.lstrip()
+            self._started = bool(emitted)
+        return emitted.rstrip() if final else emitted
+
+def clean_response(text):
+    with span("clean_response"):
+        cleaner = ResponseCleaner()
+        return (cleaner.feed(text) + cleaner.flush()).strip()
+
+RESPONSE_CACHE = get_response_cache()
+IN_FLIGHT = get_singleflight("model")
+HTTP = get_http_client()
+HTTP.limit(MODEL_URL, MODEL_MAX_CONCURRENCY)
+HTTP.limit(BREVO_URL, BREVO_MAX_CONCURRENCY)
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram("adigy_time_to_first_token_seconds", "Time from request to first streamed text")
+
+# Counters other components already keep, read when metrics are scraped
+for name, help, kind, read in (
+    ("adigy_response_cache_hits_total", "Response cache hits", "counter", lambda: RESPONSE_CACHE.stats()["hits"]),
+    ("adigy_response_cache_misses_total", "Response cache misses", "counter", lambda: RESPONSE_CACHE.stats()["misses"]),
+    ("adigy_response_cache_evictions_total", "Response cache evictions", "counter",
+     lambda: RESPONSE_CACHE.stats()["evictions"]),
+    ("adigy_response_cache_entries", "Responses held in memory", "gauge", lambda: RESPONSE_CACHE.stats()["size"]),
+    ("adigy_model_requests_total", "Model requests sent after coalescing", "counter",
+     lambda: IN_FLIGHT.stats()["leaders"]),
+    ("adigy_model_requests_coalesced_total", "Callers that joined an in-flight model request", "counter",
+     lambda: IN_FLIGHT.stats()["coalesced"]),
+    ("adigy_faq_direct_answers_total", "Questions answered from the FAQ without the model", "counter",
+     lambda: MATCH_STATS.stats()["direct"]),
+    ("adigy_faq_match_queries_total", "Questions scored by the FAQ matcher", "counter",
+     lambda: MATCH_STATS.stats()["queries"]),
+):
+    REGISTRY.callback(name, help, read, kind)
+start_exporters()
+
+class ModelError(Exception):
+    pass
+
+def get_cached_response(query):
+    direct_answer = faq_answer(query)
+    if direct_answer is not None:
+        return direct_answer
+    snippets = relevant_snippets(query, FAQ_STORE.current())
+    key = cache_key(query, "\n".join(snippets))
+    response = RESPONSE_CACHE.get(key)
+    if response is not None:
+        return response
+
+    def fetch():
+        response = generate_response(query, snippets=snippets)
+        RESPONSE_CACHE.set(key, response)
+        return response
+
+    # Concurrent sessions asking the same thing share one upstream request
+    try:
+        return IN_FLIGHT.do(key, fetch)
+    except ModelError as e:
+        return str(e)
+
+def stream_cached_response(query):
+    direct_answer = faq_answer(query)
+    if direct_answer is not None:
+        yield direct_answer
+        return
+    snippets = relevant_snippets(query, FAQ_STORE.current())
+    key = cache_key(query, "\n".join(snippets))
+    response = RESPONSE_CACHE.get(key)
+    if response is not None:
+        yield response
+        return
+    flight, leader = IN_FLIGHT.begin(key)
+    parts = []
+    try:
+        if leader:
+            for text in stream_model_response(query, snippets=snippets):
+                parts.append(text)
+                flight.publish(text)
+                yield text
+        else:
+            # Follow the leader's stream instead of sending our own request
+            for text in flight.stream():
+                parts.append(text)
+                yield text
+    except ModelError as e:
+        if leader:
+            IN_FLIGHT.finish(key, flight, error=e)
+        yield ("\n\n" if parts else "") + str(e)
+        return
+    except BaseException:
+        # The session stopped reading (e.g. a rerun); release anyone following us
+        if leader:
+            IN_FLIGHT.finish(key, flight, error=ModelError("Request was interrupted. Please try again."))
+        raise
+    if leader:
+        response = "".join(parts).strip()
+        RESPONSE_CACHE.set(key, response)
+        IN_FLIGHT.finish(key, flight, result=response)
+
+def get_model_response(user_query, conversation_history=[]):
+    direct_answer = faq_answer(user_query)
+    if direct_answer is not None:
+        return direct_answer
+    try:
+        return generate_response(user_query, conversation_history)
+    except ModelError as e:
+        return str(e)
+
+def faq_answer(user_query):
+    # Confident FAQ matches are answered directly, skipping the model round-trip
+    with span("faq_match") as fields:
+        match = FAQ_STORE.current().matcher.match(user_query)
+        direct = (
+            match is not None
+            and match.confidence >= FAQ_DIRECT_THRESHOLD
+            and match.confidence - match.runner_up >= FAQ_DIRECT_MARGIN
+        )
+        fields["direct"] = direct
+    MATCH_STATS.record(user_query, match, direct)
+    if not direct:
+        return None
+    logger.info(f"Answered from FAQ entry {match.key!r} without a model call")
+    return match.value
+
+def build_prompt(user_query, conversation_history, snippets):
+    # Packs the system prompt, ranked FAQ snippets and recent turns into PROMPT_TOKEN_BUDGET
+    with span("prompt_assembly"):
+        builder = get_prompt_builder(SYSTEM_PROMPT, PROMPT_TOKEN_BUDGET, PROMPT_TOKENIZER)
+        return builder.build(user_query, snippets, conversation_history)
+
+def build_payload(prompt, stream=False):
+    payload = {
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": 500,
+            "temperature": 0.6,
+            "top_p": 0.9,
+            "do_sample": True
+        }
+    }
+    if stream:
+        # Streamed text can't be un-shown, so ask the endpoint not to echo the prompt
+        payload["stream"] = True
+        payload["parameters"]["return_full_text"] = False
+    return payload
+
+def generate_response(user_query, conversation_history=[], snippets=None):
+    if not HUGGINGFACE_API_KEY:
+        raise ModelError("Error: API key not configured. Contact example@email.com.")
+    
+    logger.info(f"Processing query: {user_query}")
+    if snippets is None:
+        snippets = relevant_snippets(user_query, FAQ_STORE.current())
+    payload = build_payload(build_prompt(user_query, conversation_history, snippets))
+    
+    try:
+        with span("model_call"):
+            response = HTTP.post(MODEL_URL, headers=HUGGINGFACE_HEADERS, json=payload, timeout=10)
+            result = response.json()
+        if isinstance(result, list) and len(result) > 0:
+            generated_text = result[0].get("generated_text", "")
+            logger.debug(f"Generated text: {generated_text}")
+            return clean_response(generated_text)
+        raise ModelError("I apologize, but I encountered an error processing your query. Please try again.")
+    except requests.Timeout:
+        raise ModelError("Request timed out. Please try again later or contact example@email.com.")
+    except requests.HTTPError as e:
+        raise ModelError(f"API error (Status {e.response.status_code}). Contact example@email.com.")
+    except ModelError:
+        raise
+    except Exception as e:
+        raise ModelError(f"Unexpected error: {str(e)}. Please try again or contact example@email.com.")
+
+def iter_stream_tokens(response):
+    # The inference endpoint sends one server-sent event per generated token
+    for line in response.iter_lines():
+        if not line.startswith(b"data:"):
+            continue
+        event = json.loads(line[len(b"data:"):].decode("utf-8"))
+        if "error" in event:
+            raise ModelError(f"API error: {event['error']}. Contact example@email.com.")
+        token = event.get("token") or {}
+        if token.get("text") and not token.get("special"):
+            yield token["text"]
+
+def stream_model_response(user_query, conversation_history=[], snippets=None):
+    if not HUGGINGFACE_API_KEY:
+        raise ModelError("Error: API key not configured. Contact example@email.com.")
+
+    logger.info(f"Streaming query: {user_query}")
+    if snippets is None:
+        snippets = relevant_snippets(user_query, FAQ_STORE.current())
+    payload = build_payload(build_prompt(user_query, conversation_history, snippets), stream=True)
+
+    # Retries happen only while connecting; once tokens have been shown they can't be taken back
+    start = time.perf_counter()
+    try:
+        response = HTTP.post(MODEL_URL, headers=HUGGINGFACE_HEADERS, json=payload, timeout=10, stream=True)
+    except requests.Timeout:
+        raise ModelError("Request timed out. Please try again later or contact example@email.com.")
+    except requests.HTTPError as e:
+        raise ModelError(f"API error (Status {e.response.status_code}). Contact example@email.com.")
+    except Exception as e:
+        raise ModelError(f"Unexpected error: {str(e)}. Please try again or contact example@email.com.")
+
+    cleaner = ResponseCleaner()
+    first_token = True
+    try:
+        for token in iter_stream_tokens(response):
+            text = cleaner.feed(token)
+            if text:
+                if first_token:
+                    TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start)
+                    first_token = False
+                yield text
+    except (requests.RequestException, ValueError) as e:
+        if is_timeout(e):
+            # HTTP.post only counts timeouts up to the headers; the token stream is read here
+            TIMEOUTS.inc(endpoint=urlsplit(MODEL_URL).netloc)
+            raise ModelError("Request timed out. Please try again later or contact example@email.com.")
+        raise ModelError(f"Unexpected error: {str(e)}. Please try again or contact example@email.com.")
+    finally:
+        response.close()
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="model_stream", endpoint="")
+    text = cleaner.flush()
+    if text:
+        yield text
+
+def deliver_support_email(payload):
+    with span("email_send"):
+        HTTP.post(BREVO_URL, headers=BREVO_HEADERS, json=payload, timeout=10, retry=NO_RETRY)
+
+def send_support_email(user_query, conversation_history, user_email):
+    if not BREVO_API_KEY:
+        logger.error("Brevo API key not configured")
+        return "Error: Brevo API key not configured. Please contact an administrator."
+
+    # Build email content
+    latest_answer = conversation_history[-1]["content"] if conversation_history and conversation_history[-1]["role"] == "assistant" else "No response available."
+    lines = [
+        "Subject: Support Request from AdigyAssist User",
+        "",
+        f"User Email: {user_email or 'Not provided'}",
+        "",
+        f"Latest Question:\n{user_query}",
+        "",
+        f"Chatbot's Response:\n{latest_answer}",
+        "",
+        "Conversation History (Last 5 Messages Before Latest Question):",
+    ]
+    if len(conversation_history) > 1:
+        # Exclude the latest question and answer, take the 5 messages before them
+        lines.extend(f"{message['role'].capitalize()}: {message['content']}" for message in conversation_history[:-2][-5:])
+    else:
+        lines.append("No prior conversation history available.")
+    lines.extend(["", "Please attempt to reach out to this user promptly at the provided email address."])
+
+    # Brevo API payload
+    payload = {
+        "sender": {"name": "AdigyAssist User", "email": "aaronmichaelrazey@gmail.com"},
+        "to": [{"email": "aaronmichaelrazey@gmail.com", "name": "Adigy Support"}],
+        "subject": "Support Request from AdigyAssist User",
+        "textContent": "\n".join(lines)
+    }
+
+    # Repeated clicks on the same conversation map to the same outbox entry
+    dedup_key = hashlib.sha256(json.dumps([user_email, user_query, conversation_history], sort_keys=True).encode("utf-8")).hexdigest()
+    try:
+        # Emails are queued durably and delivered by a background worker
+        with span("email_enqueue"):
+            result = get_email_outbox(SUPPORT_OUTBOX_PATH, deliver_support_email).enqueue(payload, dedup_key)
+    except sqlite3.Error as e:
+        logger.error(f"Failed to queue support email: {str(e)}")
+        return f"Unexpected error sending email: {str(e)}. Please try again later."
+    if result == "duplicate":
+        return "Support request for this conversation was already submitted successfully."
+    if result == "requeued":
+        return "Your earlier support request could not be delivered, so it was resubmitted successfully. Our team at example@email.com will follow up."
+    return "Support request submitted successfully! Our team at example@email.com will follow up."
@@ -0,0 +1,80 @@
+"""Compare the old linear FAQ scan with the inverted index at growing FAQ sizes.
+
+Run from the repository root:  python benchmarks/bench_retrieval.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from faq_index import FaqIndex  # noqa: E402
+
+SIZES = (100, 10_000, 100_000)
+QUERIES = 200
+FAQ_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "faq_data.json")
+
+
+def linear_scan(query, faq_data):
+    # The extract_relevant_info implementation the index replaced
+    query = query.lower().strip()
+    exact_matches = []
+    matched_info = []
+    for key, value in faq_data.items():
+        key_words = key.split()
+        query_words = query.split()
+        if query == key:
+            exact_matches.append(value)
+        elif all(word in query_words for word in key_words):
+            matched_info.append(value)
+        elif any(word in query for word in key_words):
+            matched_info.append(value)
+    if exact_matches:
+        return " ".join(exact_matches)
+    if matched_info:
+        return " ".join(matched_info[:2])
+    return None
+
+
+def synthetic_faq(size, seed_faq, rng):
+    # Grow the real FAQ by recombining its own vocabulary so term statistics stay realistic
+    vocabulary = sorted({word for key in seed_faq for word in key.split()} |
+                        {word for value in seed_faq.values() for word in value.lower().split()[:40]})
+    faq = dict(list(seed_faq.items())[:size])
+    while len(faq) < size:
+        key = " ".join(rng.sample(vocabulary, rng.randint(1, 4)))
+        faq.setdefault(f"{key} {len(faq)}", " ".join(rng.choices(vocabulary, k=rng.randint(20, 60))))
+    return faq
+
+
+def time_per_query(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    rng = random.Random(7)
+    with open(FAQ_PATH, "r") as f:
+        seed_faq = json.load(f)
+    seed_keys = list(seed_faq)
+    queries = [f"how does {rng.choice(seed_keys)} work in my account" for _ in range(QUERIES)]
+
+    print(f"{'entries':>8} {'build ms':>10} {'scan ms/q':>10} {'index ms/q':>11} {'speedup':>8}")
+    for size in SIZES:
+        faq = synthetic_faq(size, seed_faq, rng)
+        start = time.perf_counter()
+        index = FaqIndex(faq)
+        build_ms = (time.perf_counter() - start) * 1000
+        # The linear scan is slow enough at 100k entries that a sample is plenty
+        scan_queries = queries if size <= 10_000 else queries[:20]
+        scan_ms = time_per_query(lambda q: linear_scan(q, faq), scan_queries)
+        index_ms = time_per_query(lambda q: index.search(q, k=2), queries)
+        print(f"{size:>8} {build_ms:>10.1f} {scan_ms:>10.3f} {index_ms:>11.3f} {scan_ms / index_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Recall and latency of the FAQ retrievers on paraphrased questions.
+
+Compares the original keyword scan, the BM25 index, the vector index and the
+fused ranking the app uses. Run from the repository root:
+
+    python tools/build_faq_vectors.py   # optional, otherwise vectors are built in memory
+    python benchmarks/bench_semantic.py
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from faq_store import FaqSnapshot  # noqa: E402
+
+# Questions phrased the way users ask them, with the FAQ key that answers each
+PARAPHRASES = [
+    ("how do I get my money back", "money-back guarantee"),
+    ("can I get a refund within 30 days", "money-back guarantee"),
+    ("how much do I have to pay each month", "cost"),
+    ("is there a way to try it before paying", "free trial"),
+    ("how do I stop my plan", "cancel subscription"),
+    ("my campaigns are still spending after I cancelled", "ads still running"),
+    ("can I use it with firefox or safari", "other browsers"),
+    ("the extension is not syncing my books", "extension sync"),
+    ("how long before I see any results", "results time"),
+    ("why is my acos so high at the start", "high acos initially"),
+    ("what acos should I aim for", "target acos"),
+    ("what is a good acos", "good acos"),
+    ("my card was declined", "payment fails"),
+    ("sales numbers in the dashboard look wrong", "incorrect sales data"),
+    ("my amazon ads account got banned", "account suspended"),
+    ("how do I stop getting emails from you", "stop emails"),
+    ("does it work for novels as well as nonfiction", "fiction or non-fiction"),
+    ("can I temporarily stop advertising a book", "pause advertising"),
+    ("can I change the names of campaigns", "rename campaigns"),
+    ("do I need reviews before advertising", "reviews needed"),
+    ("how do I tell it to ignore certain search terms", "negative keywords"),
+    ("what does gold panning do", "gold panning"),
+    ("can I have different budgets for each book", "individual book budgets"),
+    ("what is the lowest budget I can set", "minimum budget"),
+    ("how do I reach customer support", "support"),
+    ("what is the difference with adsdroid", "difference between adigy and adsdroid"),
+    ("will it go over my budget", "stay within budget"),
+    ("does it handle video ads", "video ads"),
+    ("it says my book is ineligible", "ineligible book"),
+    ("should I raise my budget for christmas", "holiday budget"),
+]
+
+
+def legacy_keys(query, faq_data, k=2):
+    # The keyword scan extract_relevant_info used before the indexes, returning keys
+    query = query.lower().strip()
+    matched = []
+    for key in faq_data:
+        key_words = key.split()
+        query_words = query.split()
+        if query == key:
+            return [key]
+        if all(word in query_words for word in key_words) or any(word in query for word in key_words):
+            matched.append(key)
+    return matched[:k]
+
+
+def evaluate(name, retrieve):
+    hits_at_1 = hits_at_2 = 0
+    start = time.perf_counter()
+    for query, expected in PARAPHRASES:
+        keys = retrieve(query)
+        hits_at_1 += keys[:1] == [expected]
+        hits_at_2 += expected in keys[:2]
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(PARAPHRASES)
+    total = len(PARAPHRASES)
+    print(f"{name:<10} {hits_at_1 / total:>10.2f} {hits_at_2 / total:>10.2f} {elapsed_ms:>10.3f}")
+
+
+def main():
+    faq_path = os.path.join(ROOT, "faq_data.json")
+    with open(faq_path, "r") as f:
+        faq = FaqSnapshot(json.load(f), vectors_prefix=os.path.splitext(faq_path)[0] + "_vectors")
+    print(f"vectors: {faq.vectors.embedder.name}, {type(faq.vectors.matrix).__name__}")
+    print(f"{'retriever':<10} {'recall@1':>10} {'recall@2':>10} {'ms/query':>10}")
+    evaluate("legacy", lambda q: legacy_keys(q, faq.data))
+    evaluate("bm25", lambda q: [key for key, _, _ in faq.index.search(q, k=2)])
+    evaluate("vector", lambda q: [key for key, _ in faq.vectors.search(q, k=2)])
+    evaluate("hybrid", lambda q: [key for key, _, _ in faq.search(q, k=2)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Upstream QPS against concurrent users, with and without request coalescing.
+
+Each simulated user repeatedly asks one of a few popular questions; the fake
+upstream takes UPSTREAM_LATENCY seconds per call. Run from the repository root:
+
+    python benchmarks/load_singleflight.py
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from singleflight import SingleFlight  # noqa: E402
+
+USERS = (1, 5, 10, 25, 50, 100)
+POPULAR_QUERIES = ("cost", "free trial", "cancel subscription", "money-back guarantee", "setup")
+UPSTREAM_LATENCY = 0.2
+DURATION = 3.0
+
+
+def run(users, coalesce):
+    group = SingleFlight()
+    upstream_calls = 0
+    answered = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+
+    def upstream(query):
+        nonlocal upstream_calls
+        with lock:
+            upstream_calls += 1
+        time.sleep(UPSTREAM_LATENCY)
+        return f"answer to {query}"
+
+    def session(seed):
+        nonlocal answered
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            query = rng.choice(POPULAR_QUERIES)
+            if coalesce:
+                group.do(query, lambda: upstream(query))
+            else:
+                upstream(query)
+            with lock:
+                answered += 1
+
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return upstream_calls / elapsed, answered / elapsed, group.stats()["coalesced"]
+
+
+def main():
+    print(f"{'users':>6} {'upstream qps':>13} {'coalesced qps':>14} {'answers/s':>10} {'coalesced':>10}")
+    for users in USERS:
+        plain_qps, _, _ = run(users, coalesce=False)
+        upstream_qps, answer_qps, coalesced = run(users, coalesce=True)
+        print(f"{users:>6} {plain_qps:>13.1f} {upstream_qps:>14.1f} {answer_qps:>10.1f} {coalesced:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Load test the headless assistant against the fake inference endpoint.
+
+Simulates concurrent chat sessions asking a mix of FAQ questions, paraphrases
+and never-seen questions, then reports latency percentiles, throughput, how
+each question was answered (FAQ, cache or model), upstream traffic and memory.
+Run from the repository root:
+
+    python benchmarks/load_test.py --sessions 1,10,50 --requests 20
+    python benchmarks/load_test.py --stream --rate-limit-rate 0.1
+"""
+import argparse
+import logging
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from bench_semantic import PARAPHRASES  # noqa: E402
+from fake_inference import start_fake_inference  # noqa: E402
+
+ERROR_PREFIXES = ("Error:", "API error", "Request timed out", "Unexpected error", "I apologize", "Request was interrupted")
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+# Subjects the FAQ keys don't mention, so these questions can't be answered directly
+OFF_FAQ_TOPICS = ["copyright", "translation", "audiobook", "illustrator", "preorder", "royalty statement", "isbn"]
+
+
+def unique_query(rng, matcher):
+    # Never asked before and scores against no FAQ key, so it misses the cache and reaches the model
+    while True:
+        query = f"question about {rng.choice(OFF_FAQ_TOPICS)} {rng.getrandbits(32):08x}"
+        if matcher.match(query) is None:
+            return query
+
+
+def pick_query(rng, faq_keys, matcher, unique_fraction):
+    roll = rng.random()
+    if roll < unique_fraction:
+        return unique_query(rng, matcher)
+    if roll < unique_fraction + (1 - unique_fraction) / 2:
+        return rng.choice(PARAPHRASES)[0]
+    return rng.choice(faq_keys)
+
+
+def run(assistant, server, sessions, requests_per_session, stream, unique_fraction, think_time):
+    assistant.RESPONSE_CACHE.clear()
+    faq = assistant.FAQ_STORE.current()
+    faq_keys = list(faq.data)
+    latencies, first_tokens = [], []
+    errors = 0
+    lock = threading.Lock()
+    upstream_before = server.requests if server else 0
+    direct_before = assistant.MATCH_STATS.stats()["direct"]
+    hits_before = assistant.RESPONSE_CACHE.stats()["hits"]
+    flights_before = assistant.IN_FLIGHT.stats()
+
+    def session(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in range(requests_per_session):
+            query = pick_query(rng, faq_keys, faq.matcher, unique_fraction)
+            start = time.perf_counter()
+            first_token = None
+            if stream:
+                parts = []
+                for text in assistant.stream_cached_response(query):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    parts.append(text)
+                response = "".join(parts)
+            else:
+                response = assistant.get_cached_response(query)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if first_token is not None:
+                    first_tokens.append(first_token)
+                errors += response.startswith(ERROR_PREFIXES)
+            if think_time:
+                time.sleep(rng.uniform(0, think_time))
+
+    tracemalloc.start()
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    flights = assistant.IN_FLIGHT.stats()
+    latencies_ms = sorted(value * 1000 for value in latencies)
+    first_tokens_ms = sorted(value * 1000 for value in first_tokens)
+    return {
+        "sessions": sessions,
+        "requests": len(latencies),
+        "errors": errors,
+        "qps": len(latencies) / wall,
+        "p50": percentile(latencies_ms, 50),
+        "p95": percentile(latencies_ms, 95),
+        "p99": percentile(latencies_ms, 99),
+        "ttft_p50": percentile(first_tokens_ms, 50) if first_tokens_ms else None,
+        # How each question was answered; coalesced callers shared another session's model call
+        "direct": assistant.MATCH_STATS.stats()["direct"] - direct_before,
+        "cached": assistant.RESPONSE_CACHE.stats()["hits"] - hits_before,
+        "model": flights["leaders"] - flights_before["leaders"],
+        "coalesced": flights["coalesced"] - flights_before["coalesced"],
+        "upstream": (server.requests - upstream_before) if server else None,
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,10,50", help="comma-separated concurrent session counts")
+    parser.add_argument("--requests", type=int, default=20, help="questions asked per session")
+    parser.add_argument("--stream", action="store_true", help="use the streaming path and report time to first token")
+    parser.add_argument("--unique-fraction", type=float, default=0.3, help="share of questions never asked before")
+    parser.add_argument("--think-time", type=float, default=0.0, help="max seconds a session pauses between questions")
+    parser.add_argument("--url", help="use an already running endpoint instead of the bundled fake")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    server = None
+    if args.url:
+        url = args.url
+    else:
+        server = start_fake_inference(latency=args.latency, token_delay=args.token_delay,
+                                      error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+        url = server.url
+
+    with tempfile.TemporaryDirectory(prefix="adigy-bench-") as workdir:
+        # The assistant reads its configuration once, at import
+        os.environ.update({
+            "MODEL_URL": url,
+            "HUGGINGFACE_API_KEY": os.getenv("HUGGINGFACE_API_KEY", "benchmark"),
+            "SUPPORT_OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        })
+        os.environ.pop("RESPONSE_CACHE_PATH", None)
+        import assistant
+
+        print(f"endpoint {url}, {'streaming' if args.stream else 'blocking'}, {args.requests} questions per session")
+        print(f"{'sessions':>8} {'reqs':>6} {'errors':>6} {'qps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'ttft p50':>9} {'direct':>7} {'cached':>7} {'model':>6} {'joined':>7} {'upstream':>9} {'peak MB':>8}")
+        for sessions in (int(value) for value in args.sessions.split(",")):
+            result = run(assistant, server, sessions, args.requests, args.stream, args.unique_fraction,
+                         args.think_time)
+            ttft = f"{result['ttft_p50']:.1f}" if result["ttft_p50"] is not None else "-"
+            upstream = result["upstream"] if result["upstream"] is not None else "-"
+            print(f"{result['sessions']:>8} {result['requests']:>6} {result['errors']:>6} {result['qps']:>8.1f} "
+                  f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} {ttft:>9} "
+                  f"{result['direct']:>7} {result['cached']:>7} {result['model']:>6} {result['coalesced']:>7} "
+                  f"{upstream:>9} {result['peak_mb']:>8.2f}")
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"max RSS {max_rss:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
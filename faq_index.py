@@ -0,0 +1,113 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+# Words too common to say anything about which FAQ entry a query is after
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been before but by can could
+did do does doing for from had has have how i if in into is it its me my no not
+of on or our so than that the their them then there these they this to too up
+us was we were what when where which while who why will with would you your
+""".split())
+
+# BM25 parameters and how much more a key term counts than an answer term
+K1 = 1.2
+B = 0.75
+KEY_WEIGHT = 3
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        # "money-back" should also match "money" and "back"
+        if "-" in token:
+            tokens.extend(part for part in token.split("-") if part not in STOPWORDS)
+    return tokens
+
+
+class FaqIndex:
+    def __init__(self, faq_data):
+        self.keys = []
+        self.values = []
+        self.exact = {}
+        term_freqs = []
+        for key, value in faq_data.items():
+            normalized = key.lower().strip()
+            self.exact.setdefault(normalized, len(self.keys))
+            self.keys.append(key)
+            self.values.append(value)
+            counts = Counter(tokenize(value))
+            for token in tokenize(key):
+                counts[token] += KEY_WEIGHT
+            term_freqs.append(counts)
+
+        doc_lengths = [sum(counts.values()) for counts in term_freqs]
+        avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+        doc_freqs = Counter()
+        for counts in term_freqs:
+            doc_freqs.update(counts.keys())
+
+        # Scores are fully precomputed per posting, so a lookup only sums the
+        # posting lists of the query's terms and never touches other entries
+        total = len(term_freqs)
+        postings = defaultdict(dict)
+        for doc_id, counts in enumerate(term_freqs):
+            norm = K1 * (1 - B + B * doc_lengths[doc_id] / avg_length) if avg_length else K1
+            for term, tf in counts.items():
+                idf = math.log(1 + (total - doc_freqs[term] + 0.5) / (doc_freqs[term] + 0.5))
+                postings[term][doc_id] = idf * tf * (K1 + 1) / (tf + norm)
+        self.postings = dict(postings)
+        # Each term's entries from highest to lowest weight, and the most any one entry
+        # can gain from the term, so search() can stop reading a list early
+        self.impact_order = {
+            term: sorted(weights, key=weights.get, reverse=True) for term, weights in self.postings.items()
+        }
+        self.max_weights = {term: weights[self.impact_order[term][0]] for term, weights in self.postings.items()}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def exact_match(self, query):
+        doc_id = self.exact.get(query.lower().strip())
+        return None if doc_id is None else self.values[doc_id]
+
+    def search(self, query, k=2):
+        # Threshold algorithm: walk every query term's list from its highest weight
+        # down, scoring each new entry in full, and stop once the k-th best score beats
+        # anything an unread entry could still total. Long lists of common terms are
+        # only read as deep as the rarer terms force.
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        orders = [self.impact_order[term] for term in terms]
+        weights = [self.postings[term] for term in terms]
+        frontier = [self.max_weights[term] for term in terms]
+        scores = {}
+        # Min-heap of the k best scores so far
+        best = []
+        depth = 0
+        while True:
+            reading = False
+            for i, order in enumerate(orders):
+                if depth >= len(order):
+                    frontier[i] = 0.0
+                    continue
+                reading = True
+                doc_id = order[depth]
+                frontier[i] = weights[i][doc_id]
+                if doc_id in scores:
+                    continue
+                score = scores[doc_id] = sum(term_weights.get(doc_id, 0.0) for term_weights in weights)
+                if len(best) < k:
+                    heapq.heappush(best, score)
+                elif score > best[0]:
+                    heapq.heapreplace(best, score)
+            depth += 1
+            if not reading or (len(best) == k and best[0] > sum(frontier)):
+                break
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.keys[doc_id], self.values[doc_id], score) for doc_id, score in top]
@@ -0,0 +1,134 @@
+import difflib
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+
+from faq_index import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Query words mapped onto the vocabulary the FAQ keys use
+SYNONYMS = {
+    "price": "cost", "pricing": "cost", "fee": "cost", "charge": "cost", "expensive": "cost", "cheap": "cost",
+    "cancellation": "cancel", "unsubscribe": "cancel", "cancelling": "cancel", "canceling": "cancel",
+    "canceled": "cancel", "cancelled": "cancel",
+    "plan": "subscription", "membership": "subscription",
+    "firefox": "browser", "safari": "browser", "edge": "browser", "brave": "browser", "opera": "browser",
+    "plugin": "extension", "addon": "extension",
+    "install": "setup", "installation": "setup", "onboarding": "setup",
+    "ads": "ad", "advert": "ad", "advertisement": "ad",
+    "notification": "email",
+    "suspend": "suspension", "suspended": "suspension", "banned": "suspension",
+}
+
+FUZZY_CUTOFF = 0.8
+HISTOGRAM_BUCKETS = 10
+
+
+def normalize_term(word):
+    word = SYNONYMS.get(word, word)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = SYNONYMS.get(word[:-1], word[:-1])
+    return word
+
+
+def terms(text):
+    words = WORD_RE.findall(text.lower())
+    return {normalize_term(word) for word in words if len(word) > 1 and word not in STOPWORDS}
+
+
+class FaqMatch:
+    def __init__(self, key, value, confidence, runner_up=0.0):
+        self.key = key
+        self.value = value
+        self.confidence = confidence
+        self.runner_up = runner_up
+
+
+class FaqMatcher:
+    # Scores how completely a query covers one FAQ key, from 0 (nothing) to 1 (exact)
+    def __init__(self, faq_data):
+        self.keys = list(faq_data)
+        self.values = [faq_data[key] for key in self.keys]
+        self.exact = {key.lower().strip(): doc_id for doc_id, key in enumerate(self.keys)}
+        self.key_terms = [terms(key) for key in self.keys]
+        self.by_term = defaultdict(list)
+        for doc_id, key_terms in enumerate(self.key_terms):
+            for term in key_terms:
+                self.by_term[term].append(doc_id)
+        # Terms shared by many keys (e.g. "budget") say less about which key is meant
+        total = len(self.keys)
+        self.weights = {term: math.log(1 + total / len(ids)) for term, ids in self.by_term.items()}
+        self.max_weight = max(self.weights.values(), default=1.0)
+        self.vocabulary = sorted(self.by_term)
+        self._fuzzy = {}
+
+    def _resolve(self, term):
+        if term in self.by_term:
+            return term
+        match = self._fuzzy.get(term)
+        if match is None:
+            close = difflib.get_close_matches(term, self.vocabulary, n=1, cutoff=FUZZY_CUTOFF)
+            match = close[0] if close else ""
+            if len(self._fuzzy) < 10000:
+                self._fuzzy[term] = match
+        return match or term
+
+    def match(self, query):
+        doc_id = self.exact.get(query.lower().strip())
+        if doc_id is not None:
+            return FaqMatch(self.keys[doc_id], self.values[doc_id], 1.0)
+
+        query_terms = {self._resolve(term) for term in terms(query)}
+        if not query_terms:
+            return None
+        # Words no key uses weigh as much as the rarest key term: "is my chrome extension
+        # broken" asks about more than the "chrome extension" entry answers
+        query_weight = sum(self.weights.get(term, self.max_weight) for term in query_terms)
+        scored = []
+        for doc_id in {doc_id for term in query_terms for doc_id in self.by_term.get(term, ())}:
+            key_terms = self.key_terms[doc_id]
+            matched = sum(self.weights[term] for term in key_terms & query_terms)
+            key_coverage = matched / sum(self.weights[term] for term in key_terms)
+            query_coverage = matched / query_weight
+            scored.append((key_coverage * math.sqrt(query_coverage), doc_id))
+        if not scored:
+            return None
+        scored.sort(reverse=True)
+        confidence, doc_id = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        return FaqMatch(self.keys[doc_id], self.values[doc_id], confidence, runner_up)
+
+
+class MatchStats:
+    def __init__(self):
+        self.queries = 0
+        self.direct = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self._lock = threading.Lock()
+
+    def record(self, query, match, direct):
+        confidence = match.confidence if match else 0.0
+        with self._lock:
+            self.queries += 1
+            self.direct += int(direct)
+            self.histogram[min(int(confidence * HISTOGRAM_BUCKETS), HISTOGRAM_BUCKETS - 1)] += 1
+        logger.info(
+            f"FAQ match score={confidence:.3f} runner_up={match.runner_up if match else 0.0:.3f} "
+            f"key={match.key if match else None!r} direct={direct} query={query!r}"
+        )
+
+    def stats(self):
+        with self._lock:
+            buckets = {
+                f"{i / HISTOGRAM_BUCKETS:.1f}-{(i + 1) / HISTOGRAM_BUCKETS:.1f}": count
+                for i, count in enumerate(self.histogram)
+            }
+            return {"queries": self.queries, "direct": self.direct, "histogram": buckets}
+
+
+MATCH_STATS = MatchStats()
@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from faq_index import FaqIndex
+from faq_matcher import FaqMatcher
+from faq_vectors import VectorIndex, get_embedder, load_vector_index
+
+logger = logging.getLogger(__name__)
+
+# How often a rerun may stat() the FAQ file to look for edits
+CHECK_INTERVAL = 2.0
+
+# Reciprocal rank fusion constant, how deep each retriever's list is read, and
+# the cosine similarity below which a semantic hit is treated as noise
+RRF_K = 60
+RRF_DEPTH = 10
+MIN_SIMILARITY = 0.3
+
+
+class FaqSnapshot:
+    def __init__(self, faq_data, mtime=None, vectors_prefix=None):
+        self.data = {key.lower().strip(): value.strip() for key, value in faq_data.items()}
+        self.index = FaqIndex(self.data)
+        self.matcher = FaqMatcher(self.data)
+        self.vectors = load_vector_index(vectors_prefix, self.data) if vectors_prefix else None
+        if self.vectors is None:
+            self.vectors = VectorIndex.build(self.data, get_embedder(os.getenv("FAQ_EMBEDDER")))
+        self.mtime = mtime
+
+    def __len__(self):
+        return len(self.data)
+
+    def search(self, query, k=2):
+        # Fuse keyword and semantic rankings so paraphrases are found without
+        # losing entries that only match on exact terms
+        fused = {}
+        for rank, (key, _, _) in enumerate(self.index.search(query, k=RRF_DEPTH)):
+            fused[key] = fused.get(key, 0.0) + 1 / (RRF_K + rank)
+        for rank, (key, similarity) in enumerate(self.vectors.search(query, k=RRF_DEPTH)):
+            if similarity >= MIN_SIMILARITY:
+                fused[key] = fused.get(key, 0.0) + 1 / (RRF_K + rank)
+        top = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(key, self.data[key], score) for key, score in top]
+
+
+class FaqStore:
+    def __init__(self, path, fallback=None, vectors_prefix=None):
+        self.path = path
+        self.fallback = fallback or {}
+        # Prebuilt by tools/build_faq_vectors.py; built in memory when missing or stale
+        self.vectors_prefix = vectors_prefix or os.path.splitext(path)[0] + "_vectors"
+        self._lock = threading.Lock()
+        self._reloading = False
+        # mtime of a version that failed to load, so it is retried only once it changes
+        self._failed_mtime = None
+        self._last_check = time.monotonic()
+        self._snapshot = self._load()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self, mtime=None):
+        if mtime is None:
+            mtime = self._mtime()
+        try:
+            with open(self.path, "r") as f:
+                faq_data = json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"FAQ file {self.path} not found, using built-in FAQ")
+            return FaqSnapshot(self.fallback)
+        if not isinstance(faq_data, dict) or not all(
+            isinstance(key, str) and isinstance(value, str) for key, value in faq_data.items()
+        ):
+            raise ValueError(f"{self.path} must hold a JSON object mapping each question to its answer text")
+        snapshot = FaqSnapshot(faq_data, mtime, self.vectors_prefix)
+        logger.info(f"Loaded {len(snapshot)} FAQ entries from {self.path}")
+        return snapshot
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._last_check >= CHECK_INTERVAL:
+            self._last_check = now
+            mtime = self._mtime()
+            if mtime != self._snapshot.mtime and mtime != self._failed_mtime:
+                self._start_reload()
+        return self._snapshot
+
+    def _start_reload(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        # Rebuild off the request path; readers keep the old snapshot until the swap
+        threading.Thread(target=self._reload, name="faq-reload", daemon=True).start()
+
+    def _reload(self):
+        mtime = self._mtime()
+        try:
+            self._snapshot = self._load(mtime)
+            self._failed_mtime = None
+        except (OSError, ValueError) as e:
+            # A half-written file is common while editing; keep serving the old one
+            # and wait for the next save rather than re-reading this one
+            self._failed_mtime = mtime
+            logger.error(f"Failed to reload FAQ from {self.path}: {str(e)}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    def reload(self):
+        self._snapshot = self._load()
+        return self._snapshot
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_faq_store(path, fallback=None):
+    # One store per file for the whole process, shared by every Streamlit session
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = FaqStore(path, fallback)
+        return store
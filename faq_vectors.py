@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import re
+import zlib
+
+import numpy as np
+
+from faq_index import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+# How much more the key counts than the answer text in an entry's vector
+KEY_WEIGHT = 2.0
+
+
+class HashingEmbedder:
+    # Dependency-free fallback: word unigrams plus character n-grams hashed into a
+    # fixed number of buckets, so "money back" and "money-back" land close together
+    def __init__(self, dim=1024, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        words = [word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+        features = list(words)
+        low, high = self.ngram_range
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return normalize_rows(matrix)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name):
+        # Optional: only used when sentence-transformers is installed and asked for
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = model_name
+
+    def embed(self, texts):
+        vectors = self.model.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.astype(np.float32)
+
+
+def get_embedder(name=None):
+    if not name or name.startswith("hashing"):
+        dim = int(name.split("-", 1)[1]) if name and "-" in name else 1024
+        return HashingEmbedder(dim)
+    try:
+        return SentenceTransformerEmbedder(name)
+    except ImportError:
+        logger.warning(f"sentence-transformers not installed, using hashed n-grams instead of {name}")
+        return HashingEmbedder()
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def faq_checksum(faq_data):
+    return hashlib.sha256(json.dumps(faq_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def embed_faq(faq_data, embedder):
+    keys = list(faq_data)
+    key_vectors = embedder.embed(keys)
+    value_vectors = embedder.embed([faq_data[key] for key in keys])
+    return keys, normalize_rows(KEY_WEIGHT * key_vectors + value_vectors).astype(np.float32)
+
+
+class VectorIndex:
+    def __init__(self, keys, matrix, embedder):
+        self.keys = keys
+        self.matrix = matrix
+        self.embedder = embedder
+
+    @classmethod
+    def build(cls, faq_data, embedder):
+        keys, matrix = embed_faq(faq_data, embedder)
+        return cls(keys, matrix, embedder)
+
+    def search(self, query, k=2):
+        if not self.keys:
+            return []
+        scores = self.matrix @ self.embedder.embed([query])[0]
+        k = min(k, len(self.keys))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.keys[i], float(scores[i])) for i in top]
+
+    def save(self, prefix, checksum):
+        np.save(f"{prefix}.npy", np.ascontiguousarray(self.matrix, dtype=np.float32))
+        with open(f"{prefix}.json", "w") as f:
+            json.dump({"embedder": self.embedder.name, "checksum": checksum, "keys": self.keys}, f)
+
+
+def load_vector_index(prefix, faq_data):
+    # Returns None when there is no prebuilt index or it was built from another FAQ
+    try:
+        with open(f"{prefix}.json", "r") as f:
+            meta = json.load(f)
+        matrix = np.load(f"{prefix}.npy", mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if meta.get("checksum") != faq_checksum(faq_data) or len(meta.get("keys", ())) != matrix.shape[0]:
+        logger.warning(f"FAQ vectors at {prefix}.npy are stale, rebuild them with tools/build_faq_vectors.py")
+        return None
+    embedder = get_embedder(meta.get("embedder"))
+    if embedder.name != meta.get("embedder"):
+        return None
+    return VectorIndex(meta["keys"], matrix, embedder)
@@ -0,0 +1,200 @@
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+from metrics import REGISTRY, span
+
+logger = logging.getLogger(__name__)
+
+RETRIES = REGISTRY.counter("adigy_http_retries_total", "Upstream requests retried", ("endpoint", "reason"))
+TIMEOUTS = REGISTRY.counter("adigy_http_timeouts_total", "Upstream attempts that timed out", ("endpoint",))
+RATE_LIMITED = REGISTRY.counter("adigy_http_rate_limited_total", "Upstream attempts answered with 429", ("endpoint",))
+
+
+class RetryPolicy:
+    def __init__(self, attempts=3, base_delay=0.25, max_delay=2.0, max_total_delay=1.0,
+                 retry_statuses=(429, 502, 503, 504)):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_total_delay = max_total_delay
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def delay(self, attempt, response=None, slept=0.0):
+        # Returns how long to wait before the next attempt, or None to give up
+        if attempt + 1 >= self.attempts:
+            return None
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            # Full jitter keeps sessions that failed together from retrying together
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        # The budget covers every sleep of a call, so the Streamlit script thread is
+        # never stalled longer than max_total_delay; past it, fail fast instead
+        return delay if slept + delay <= self.max_total_delay else None
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_timeout(error):
+    # A read timeout while iterating a streamed body reaches callers as a
+    # ConnectionError wrapping urllib3's ReadTimeoutError, not as requests.Timeout
+    if isinstance(error, requests.Timeout):
+        return True
+    return isinstance(error, requests.ConnectionError) and bool(error.args) and isinstance(
+        error.args[0], ReadTimeoutError
+    )
+
+
+class SlotTimeout(requests.Timeout):
+    # Every slot for the endpoint stayed busy; raised without sending the request
+    pass
+
+
+class StreamingResponse:
+    # A streamed body is read after post() returns, so the endpoint's concurrency
+    # slot stays taken until the caller closes the response
+    def __init__(self, response, release):
+        self.response = response
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def close(self):
+        try:
+            self.response.close()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class HttpClient:
+    def __init__(self, pool_size=20, default_concurrency=8, acquire_timeout=5.0):
+        self.default_concurrency = default_concurrency
+        # How long a call queues for a free slot before failing like a timeout
+        self.acquire_timeout = acquire_timeout
+        self._limits = {}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        # One session keeps TCP+TLS connections alive and reuses them across calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def limit(self, url, max_concurrency):
+        with self._lock:
+            self._limits[urlsplit(url).netloc] = max_concurrency
+            self._semaphores.pop(urlsplit(url).netloc, None)
+
+    def _semaphore(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(
+                    self._limits.get(host, self.default_concurrency)
+                )
+            return semaphore
+
+    def post(self, url, headers=None, json=None, timeout=10, stream=False, retry=None):
+        # With stream=True the caller must close() the returned response to free its slot
+        retry = retry or RetryPolicy()
+        host = urlsplit(url).netloc
+        semaphore = self._semaphore(url)
+        attempt = 0
+        slept = 0.0
+        while True:
+            with span("concurrency_wait", endpoint=host) as fields:
+                if not semaphore.acquire(timeout=self.acquire_timeout):
+                    fields["outcome"] = "timeout"
+                    logger.warning(f"POST {url} gave up waiting {self.acquire_timeout:g}s for a free slot")
+                    raise SlotTimeout(f"No free connection slot for {host} within {self.acquire_timeout:g}s")
+            try:
+                with span("upstream_attempt", endpoint=host, attempt=attempt + 1) as fields:
+                    try:
+                        response = self.session.post(url, headers=headers, json=json, timeout=timeout, stream=stream)
+                    except requests.Timeout:
+                        fields["outcome"] = "timeout"
+                        raise
+                    except requests.ConnectionError:
+                        fields["outcome"] = "connection_error"
+                        raise
+                    fields["outcome"] = response.status_code
+            except (requests.Timeout, requests.ConnectionError) as e:
+                semaphore.release()
+                reason = "timeout" if isinstance(e, requests.Timeout) else "connection_error"
+                if reason == "timeout":
+                    TIMEOUTS.inc(endpoint=host)
+                delay = retry.delay(attempt, slept=slept)
+                if delay is None:
+                    raise
+                logger.warning(f"POST {url} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            except BaseException:
+                semaphore.release()
+                raise
+            else:
+                if response.ok:
+                    if stream:
+                        return StreamingResponse(response, semaphore.release)
+                    semaphore.release()
+                    return response
+                # Close unread error bodies so streamed connections aren't handed back mid-response
+                response.close()
+                semaphore.release()
+                if response.status_code == 429:
+                    RATE_LIMITED.inc(endpoint=host)
+                delay = None
+                if response.status_code in retry.retry_statuses:
+                    delay = retry.delay(attempt, response, slept=slept)
+                if delay is None:
+                    response.raise_for_status()
+                reason = response.status_code
+                logger.warning(f"POST {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            RETRIES.inc(endpoint=host, reason=reason)
+            # Sleep outside the semaphore so waiting callers can use the slot
+            with span("backoff_sleep", endpoint=host):
+                time.sleep(delay)
+            slept += delay
+            attempt += 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(
+                pool_size=int(os.getenv("HTTP_POOL_SIZE", "20")),
+                default_concurrency=int(os.getenv("HTTP_MAX_CONCURRENCY", "8")),
+                acquire_timeout=float(os.getenv("HTTP_ACQUIRE_TIMEOUT", "5")),
+            )
+        return _client
@@ -0,0 +1,247 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+span_logger = logging.getLogger("adigy.spans")
+
+# Seconds; spans range from sub-millisecond index lookups to multi-second model calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        for key, (counts, total, count) in items:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + (("le", repr(bound)),), cumulative
+            yield f"{self.name}_bucket", labels + (("le", "+Inf"),), count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Callback:
+    # Exposes a value some other component already tracks, read at scrape time
+    def __init__(self, name, help, kind, fn):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        try:
+            value = self.fn()
+        except Exception as e:
+            logger.error(f"Metric {self.name} failed: {str(e)}")
+            return
+        if isinstance(value, dict):
+            for labels, item in value.items():
+                yield self.name, labels, item
+        else:
+            yield self.name, (), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(name, lambda: Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get_or_create(name, lambda: Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, fn, kind="gauge"):
+        # Replaced on re-registration so a reloaded module points at its live objects
+        with self._lock:
+            self._metrics[name] = Callback(name, help, kind, fn)
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram(
+    "adigy_stage_duration_seconds", "Time spent in each request stage", ("stage", "endpoint")
+)
+
+
+@contextmanager
+def span(stage, endpoint="", **fields):
+    # Times a block into the stage histogram and logs it; callers may add fields
+    # (e.g. an outcome) to the yielded dict before the block ends
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage, endpoint=endpoint)
+        if span_logger.isEnabledFor(logging.INFO):
+            extra = "".join(f" {name}={value}" for name, value in fields.items())
+            endpoint_field = f" endpoint={endpoint}" if endpoint else ""
+            span_logger.info(f"span stage={stage}{endpoint_field} duration_ms={elapsed * 1000:.2f}{extra}")
+
+
+_listener = None
+
+
+def configure_logging(filename, level=logging.INFO):
+    # Handlers only enqueue records; a listener thread does the file I/O, so
+    # logging never blocks a request on disk
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def dump_metrics(path):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        f.write(REGISTRY.render())
+    os.replace(temporary, path)
+
+
+def _dump_forever(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            dump_metrics(path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {path}: {str(e)}")
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    # METRICS_PORT serves /metrics for Prometheus; METRICS_DUMP_PATH rewrites a
+    # text file every METRICS_DUMP_INTERVAL seconds. Both are off by default.
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            server = ThreadingHTTPServer((os.getenv("METRICS_HOST", "127.0.0.1"), int(port)), MetricsHandler)
+        except OSError as e:
+            logger.error(f"Could not start metrics endpoint on port {port}: {str(e)}")
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Serving metrics on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    path = os.getenv("METRICS_DUMP_PATH")
+    if path:
+        interval = float(os.getenv("METRICS_DUMP_INTERVAL", "60"))
+        threading.Thread(target=_dump_forever, args=(path, interval), name="metrics-dump", daemon=True).start()
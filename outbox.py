@@ -0,0 +1,151 @@
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+import requests
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+def is_permanent_failure(error):
+    # Client errors other than rate limiting won't succeed on a retry
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return 400 <= error.response.status_code < 500 and error.response.status_code != 429
+    return False
+
+
+class EmailOutbox:
+    def __init__(self, path, send, batch_size=10, max_attempts=6, base_delay=2.0, max_delay=300.0, poll_interval=5.0):
+        self.path = path
+        self.send = send
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, dedup_key TEXT NOT NULL UNIQUE, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, created_at REAL NOT NULL, last_error TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+
+    def enqueue(self, payload, dedup_key):
+        # Returns "queued" for a new email, "requeued" when an earlier attempt at the same
+        # conversation had failed for good, and "duplicate" when it is already pending or sent
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id, status FROM outbox WHERE dedup_key = ?", (dedup_key,)).fetchone()
+            if row is None:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO outbox (dedup_key, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                    (dedup_key, json.dumps(payload), now, now),
+                )
+                row_id, result = cursor.lastrowid, "queued" if cursor.rowcount == 1 else "duplicate"
+            elif row[1] == "failed":
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'pending', payload = ?, attempts = 0, next_attempt_at = ?, "
+                    "last_error = NULL WHERE id = ?",
+                    (json.dumps(payload), now, row[0]),
+                )
+                row_id, result = row[0], "requeued"
+            else:
+                row_id, result = row[0], "duplicate"
+        if result != "duplicate":
+            logger.info(f"{result.capitalize()} support email {row_id}")
+            self._wake.set()
+        return result
+
+    def drain_once(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (time.time(), self.batch_size),
+            ).fetchall()
+        if not rows:
+            return 0
+
+        # Send the batch over the pooled connection, then record every outcome in one transaction
+        updates = []
+        for row_id, payload, attempts in rows:
+            attempts += 1
+            try:
+                self.send(json.loads(payload))
+            except Exception as e:
+                if is_permanent_failure(e) or attempts >= self.max_attempts:
+                    logger.error(f"Giving up on support email {row_id} after {attempts} attempts: {str(e)}")
+                    updates.append(("failed", attempts, time.time(), str(e), row_id))
+                else:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempts))
+                    logger.warning(f"Support email {row_id} failed, retrying in {delay:.1f}s: {str(e)}")
+                    updates.append(("pending", attempts, time.time() + delay, str(e), row_id))
+            else:
+                logger.info(f"Support email {row_id} sent")
+                updates.append(("sent", attempts, time.time(), None, row_id))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?", updates
+            )
+        return len(rows)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                drained = self.drain_once()
+            except Exception as e:
+                logger.error(f"Support email outbox worker error: {str(e)}")
+                drained = 0
+            if drained < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stopped.clear()
+                self._worker = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                self._worker.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return dict(rows)
+
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+
+def get_email_outbox(path, send):
+    # One outbox and worker thread per database for the whole process
+    with _outboxes_lock:
+        outbox = _outboxes.get(path)
+        if outbox is None:
+            outbox = _outboxes[path] = EmailOutbox(path, send)
+            outbox.start()
+            REGISTRY.callback(
+                "adigy_support_emails",
+                "Support emails in the outbox by status",
+                lambda: {(("status", status),): count for status, count in outbox.stats().items()},
+            )
+        return outbox
@@ -0,0 +1,133 @@
+import logging
+import math
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+CONTEXT_HEADER = "Below is the relevant information for the user’s query:\n"
+HISTORY_HEADER = "Conversation History (if any):\n"
+SUMMARY_PREFIX = "Earlier, the user asked: "
+NO_CONTEXT = "I’m not sure about that. Try rephrasing your question or contact example@email.com for help."
+
+
+class TokenCounter:
+    # Uses the model's own tokenizer.json when one is available locally; otherwise
+    # estimates about one token per four characters of each word or symbol, which
+    # errs on the high side for English text
+    def __init__(self, tokenizer_path=None):
+        self.tokenizer = None
+        if tokenizer_path:
+            try:
+                from tokenizers import Tokenizer
+
+                self.tokenizer = Tokenizer.from_file(tokenizer_path)
+            except (ImportError, OSError, ValueError) as e:
+                logger.warning(f"Falling back to estimated token counts: {str(e)}")
+
+    def count(self, text):
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return sum(math.ceil(len(piece) / 4) for piece in PIECE_RE.findall(text))
+
+    def truncate(self, text, max_tokens):
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        # Longest prefix that still fits, cut back to a word boundary
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count(text[:middle] + "…") <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        cut = text[:low]
+        if " " in cut:
+            cut = cut[:cut.rindex(" ")]
+        return cut.rstrip() + "…"
+
+
+class PromptBuilder:
+    def __init__(self, system_prompt, budget=2048, counter=None, context_share=0.6, max_turns=6):
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.counter = counter or TokenCounter()
+        self.context_share = context_share
+        self.max_turns = max_turns
+        # Everything up to the FAQ context is identical for every request, so the
+        # endpoint can reuse its prefix cache
+        self.prefix = system_prompt + "\n\n" + CONTEXT_HEADER
+        self.prefix_tokens = self.counter.count(self.prefix)
+
+    def build(self, user_query, snippets, conversation_history=()):
+        count = self.counter.count
+        query = self.counter.truncate(user_query, self.budget // 4)
+        suffix = f"\nLatest User Query: {query}\nAssistant:"
+        remaining = self.budget - self.prefix_tokens - count(HISTORY_HEADER) - count(suffix)
+
+        # Highest ranked snippets first; the first is trimmed rather than dropped
+        context_budget = int(remaining * self.context_share)
+        context = []
+        for snippet in snippets or [NO_CONTEXT]:
+            cost = count(snippet + "\n")
+            if cost > context_budget:
+                if not context:
+                    context.append(self.counter.truncate(snippet, context_budget - 1))
+                break
+            context.append(snippet)
+            context_budget -= cost
+        context_text = "\n".join(context) + "\n\n"
+        remaining -= count(context_text)
+
+        # Most recent turns verbatim, older ones folded into a one-line summary
+        turns = []
+        history = list(conversation_history)
+        first_kept = len(history)
+        for position in range(len(history) - 1, max(0, len(history) - self.max_turns) - 1, -1):
+            message = history[position]
+            line = f"{message['role'].capitalize()}: {message['content']}\n"
+            cost = count(line)
+            if cost > remaining:
+                break
+            turns.append(line)
+            remaining -= cost
+            first_kept = position
+        turns.reverse()
+        # Older questions are summarized newest first, so a tight budget drops the oldest
+        questions = summarize_questions(history[:first_kept])
+        kept = []
+        for question in reversed(questions):
+            if count(SUMMARY_PREFIX + "; ".join([question] + kept) + "\n") > remaining:
+                break
+            kept.insert(0, question)
+        if kept:
+            turns.insert(0, SUMMARY_PREFIX + "; ".join(kept) + "\n")
+        elif questions and remaining > 8:
+            turns.insert(0, self.counter.truncate(SUMMARY_PREFIX + questions[-1], remaining - 1) + "\n")
+
+        return "".join([self.prefix, context_text, HISTORY_HEADER, *turns, suffix])
+
+
+def summarize_questions(messages, words_per_question=12):
+    return [
+        " ".join(message["content"].split()[:words_per_question])
+        for message in messages
+        if message.get("role") == "user"
+    ]
+
+
+def summarize_turns(messages, words_per_question=12):
+    questions = summarize_questions(messages, words_per_question)
+    if not questions:
+        return ""
+    return SUMMARY_PREFIX + "; ".join(questions)
+
+
+@lru_cache(maxsize=8)
+def get_prompt_builder(system_prompt, budget, tokenizer_path=None):
+    # Loading a tokenizer is slow, so builders outlive Streamlit reruns
+    return PromptBuilder(system_prompt, budget=budget, counter=TokenCounter(tokenizer_path))
@@ -0,0 +1,168 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query):
+    query = re.sub(r"[^\w\s'-]", " ", query.lower())
+    return " ".join(query.split())
+
+
+def cache_key(query, context):
+    return hashlib.sha256(f"{normalize_query(query)}\x00{context}".encode("utf-8")).hexdigest()
+
+
+class SqliteCacheBackend:
+    # The table is pruned every prune_every writes: expired rows go first, then the
+    # oldest writes until at most max_rows remain
+    def __init__(self, path, max_rows=10000, prune_every=100):
+        self.path = path
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at)")
+        self.prune()
+
+    def prune(self):
+        with self._lock, self._conn:
+            expired = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            # Every entry shares one TTL, so the earliest expiry is the oldest write
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_rows
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires_at LIMIT ?)",
+                    (excess,),
+                )
+        return expired + max(excess, 0)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        return row
+
+    def set(self, key, value, expires_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+            )
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    def __init__(self, maxsize=1000, ttl=86400, backend=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        # Fall back to the disk backend so answers survive a restart
+        if self.backend is not None:
+            try:
+                row = self.backend.get(key)
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at > now:
+                        with self._lock:
+                            self._store(key, value, expires_at)
+                            self.hits += 1
+                        return value
+                    self.backend.delete(key)
+            except sqlite3.Error as e:
+                # A locked or damaged cache file costs a model call, not the page
+                logger.error(f"Failed to read cached response: {str(e)}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to persist cached response: {str(e)}")
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    # Streamlit re-executes app.py on every interaction but imported modules stay
+    # loaded, so this one instance is shared by every rerun and session
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            path = os.getenv("RESPONSE_CACHE_PATH")
+            backend = None
+            if path:
+                try:
+                    backend = SqliteCacheBackend(path, max_rows=int(os.getenv("RESPONSE_CACHE_DISK_SIZE", "10000")))
+                except sqlite3.Error as e:
+                    logger.error(f"Falling back to in-memory response cache: {str(e)}")
+            _cache = ResponseCache(
+                maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+                ttl=float(os.getenv("RESPONSE_CACHE_TTL", "86400")),
+                backend=backend,
+            )
+        return _cache
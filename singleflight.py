@@ -0,0 +1,102 @@
+import threading
+
+
+class Flight:
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.result = None
+        self.error = None
+        self._cond = threading.Condition()
+
+    def publish(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, result=None, error=None):
+        with self._cond:
+            self.result = result
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.done, timeout):
+                raise TimeoutError("Timed out waiting for in-flight request")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def stream(self):
+        # Replays chunks the leader already published, then follows along live
+        position = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.done or len(self.chunks) > position)
+                chunks = self.chunks[position:]
+                done = self.done
+            position += len(chunks)
+            yield from chunks
+            if done and position == len(self.chunks):
+                break
+        if self.error is not None:
+            raise self.error
+        # A leader that didn't stream only has its final result to share
+        if position == 0 and self.result is not None:
+            yield self.result
+
+
+class SingleFlight:
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        # Returns the flight for key and whether the caller must perform the work
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key, flight, result=None, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(result, error)
+
+    def do(self, key, fn):
+        flight, leader = self.begin(key)
+        if not leader:
+            return flight.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._flights)}
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def get_singleflight(name="default"):
+    # Shared by every Streamlit rerun and session in the process
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight()
+        return group
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import assistant
+from prompt_builder import NO_CONTEXT
+
+FAQ = {
+    "cost": "Adigy costs $249/month.",
+    "free trial": "No free trial exists for Adigy, but a 30-day money-back guarantee applies.",
+}
+
+
+def test_extract_relevant_info_accepts_a_plain_dict():
+    assert assistant.extract_relevant_info("cost", FAQ) == FAQ["cost"]
+    assert "money-back guarantee" in assistant.extract_relevant_info("can I try it for free first", FAQ)
+    assert assistant.extract_relevant_info("weather tomorrow", FAQ) == NO_CONTEXT
+
+
+def test_extract_relevant_info_defaults_to_the_live_faq():
+    faq = assistant.FAQ_STORE.current()
+    assert assistant.extract_relevant_info("cost") == faq.data["cost"]
+    assert assistant.extract_relevant_info("cost", faq) == faq.data["cost"]
+
+
+def test_interrupted_streaming_leader_releases_its_followers(monkeypatch):
+    def fake_stream(query, conversation_history=(), snippets=None):
+        yield "Copyright "
+        yield "stays with you."
+
+    monkeypatch.setattr(assistant, "stream_model_response", fake_stream)
+    query = "question about copyright 5f3a9c21"
+    leader = assistant.stream_cached_response(query)
+    assert next(leader) == "Copyright "
+
+    follower_parts = []
+    follower = threading.Thread(target=lambda: follower_parts.extend(assistant.stream_cached_response(query)))
+    coalesced = assistant.IN_FLIGHT.stats()["coalesced"]
+    follower.start()
+    for _ in range(500):
+        if assistant.IN_FLIGHT.stats()["coalesced"] > coalesced:
+            break
+        time.sleep(0.01)
+
+    # The leader's session stops reading, e.g. on a Streamlit rerun
+    leader.close()
+    follower.join(5)
+    assert not follower.is_alive()
+    assert follower_parts[0] == "Copyright "
+    assert follower_parts[-1].endswith("Request was interrupted. Please try again.")
+    assert assistant.IN_FLIGHT.stats()["in_flight"] == 0
+    # Nothing half-finished was cached, so the next caller asks the model again
+    assert "".join(assistant.stream_cached_response(query)) == "Copyright stays with you."
@@ -0,0 +1,40 @@
+import heapq
+import random
+from collections import defaultdict
+
+import pytest
+
+from faq_index import FaqIndex, tokenize
+
+WORDS = "budget campaign acos book kindle paperback sync extension refund cancel keyword bid".split()
+
+
+def exhaustive_search(index, query, k):
+    scores = defaultdict(float)
+    for term in set(tokenize(query)):
+        for doc_id, weight in index.postings.get(term, {}).items():
+            scores[doc_id] += weight
+    top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [index.keys[doc_id] for doc_id, _ in top]
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = random.Random(5)
+    faq = {}
+    while len(faq) < 2000:
+        key = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        faq[f"{key} {len(faq)}"] = " ".join(rng.choices(WORDS, k=rng.randint(5, 40)))
+    return FaqIndex(faq)
+
+
+@pytest.mark.parametrize("k", [1, 2, 10])
+def test_pruned_search_matches_exhaustive_scoring(index, k):
+    rng = random.Random(k)
+    for _ in range(100):
+        query = " ".join(rng.sample(WORDS, rng.randint(1, 5)))
+        assert [key for key, _, _ in index.search(query, k)] == exhaustive_search(index, query, k)
+
+
+def test_search_without_known_terms(index):
+    assert index.search("what about the weather", k=2) == []
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+import faq_store
+from faq_store import FaqStore
+
+FAQ = {"cost": "Adigy costs $249/month.", "free trial": "No free trial exists for Adigy."}
+
+
+@pytest.fixture
+def faq_path(tmp_path):
+    path = tmp_path / "faq.json"
+    path.write_text(json.dumps(FAQ))
+    return path
+
+
+@pytest.fixture
+def reloads(monkeypatch):
+    # Checks the file on every call and reloads inline instead of on a thread
+    monkeypatch.setattr(faq_store, "CHECK_INTERVAL", 0.0)
+    calls = []
+
+    def start_reload(store):
+        calls.append(store.path)
+        store._reload()
+
+    monkeypatch.setattr(FaqStore, "_start_reload", start_reload)
+    return calls
+
+
+def rewrite(path, text, bump):
+    path.write_text(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+def test_reloads_after_edit(faq_path, reloads):
+    store = FaqStore(str(faq_path))
+    rewrite(faq_path, json.dumps(dict(FAQ, setup="Connect your KDP account.")), 1_000_000)
+    assert "setup" in store.current().data
+    store.current()
+    assert len(reloads) == 1
+
+
+@pytest.mark.parametrize("text", ['{"cost": "half-writ', '["cost", "free trial"]', '{"cost": 249}'])
+def test_broken_file_is_tried_once_per_save(faq_path, reloads, text):
+    store = FaqStore(str(faq_path))
+    rewrite(faq_path, text, 1_000_000)
+    for _ in range(3):
+        assert store.current().data == FAQ
+    assert len(reloads) == 1
+
+    rewrite(faq_path, json.dumps(dict(FAQ, setup="Connect your KDP account.")), 2_000_000)
+    assert "setup" in store.current().data
+    assert len(reloads) == 2
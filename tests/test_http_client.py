@@ -0,0 +1,86 @@
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from fake_inference import start_fake_inference
+from http_client import HttpClient, RetryPolicy, SlotTimeout, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, retry_after):
+        self.headers = {"Retry-After": retry_after}
+
+
+@pytest.fixture
+def inference():
+    server = start_fake_inference(port=0, latency=0.0, token_delay=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = HttpClient(pool_size=2, acquire_timeout=0.2)
+    yield client
+    client.session.close()
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("0.5") == 0.5
+    assert parse_retry_after("-3") == 0.0
+
+
+def test_parse_retry_after_http_date():
+    assert 8 <= parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "Mon, 99 Foo"])
+def test_parse_retry_after_rejects_garbage(value):
+    assert parse_retry_after(value) is None
+
+
+def test_retry_after_counts_against_the_total_budget():
+    policy = RetryPolicy(attempts=5, max_total_delay=1.0)
+    assert policy.delay(0, FakeResponse("0.6")) == 0.6
+    assert policy.delay(1, FakeResponse("0.6"), slept=0.6) is None
+    assert policy.delay(0, FakeResponse("5")) is None
+
+
+def test_jittered_delays_stay_within_the_budget():
+    policy = RetryPolicy(attempts=10, base_delay=1.0, max_delay=1.0, max_total_delay=1.0)
+    for _ in range(100):
+        delay = policy.delay(0)
+        assert delay is None or delay <= 1.0
+        assert policy.delay(1, slept=1.0) in (None, 0.0)
+
+
+def test_no_retry_after_the_last_attempt():
+    assert RetryPolicy(attempts=2).delay(1) is None
+
+
+def test_streaming_response_holds_its_slot_until_closed(inference, client):
+    client.limit(inference.url, 1)
+    payload = {"inputs": "hi", "stream": True}
+    response = client.post(inference.url, json=payload, stream=True)
+    with pytest.raises(SlotTimeout):
+        client.post(inference.url, json=payload, stream=True)
+    response.close()
+    response.close()
+    second = client.post(inference.url, json=payload, stream=True)
+    assert b"data:" in b"".join(second.iter_lines())
+    second.close()
+
+
+def test_slot_timeout_reads_as_a_timeout(inference, client):
+    client.limit(inference.url, 1)
+    response = client.post(inference.url, json={"inputs": "hi", "stream": True}, stream=True)
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        client.post(inference.url, json={"inputs": "hi"})
+    assert time.perf_counter() - start < 1.0
+    response.close()
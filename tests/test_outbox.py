@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from fake_brevo import start_fake_brevo
+from http_client import NO_RETRY, HttpClient
+from outbox import EmailOutbox
+
+API_KEY = "test-key"
+PAYLOAD = {
+    "sender": {"name": "AdigyAssist User", "email": "sender@example.com"},
+    "to": [{"email": "support@example.com", "name": "Adigy Support"}],
+    "subject": "Support Request from AdigyAssist User",
+    "textContent": "Latest Question:\nhow do I cancel?",
+}
+
+
+@pytest.fixture
+def brevo():
+    server = start_fake_brevo(port=0, api_key=API_KEY)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_outbox(brevo, tmp_path):
+    client = HttpClient(pool_size=2)
+    headers = {"api-key": API_KEY, "Content-Type": "application/json"}
+    outboxes = []
+
+    def send(payload):
+        client.post(brevo.url, headers=headers, json=payload, timeout=5, retry=NO_RETRY)
+
+    # The worker thread is never started; tests drive delivery with drain_once()
+    def make(**options):
+        outbox = EmailOutbox(str(tmp_path / "outbox.db"), send, **options)
+        outboxes.append(outbox)
+        return outbox
+
+    make.headers = headers
+    yield make
+    for outbox in outboxes:
+        outbox._conn.close()
+    client.session.close()
+
+
+def test_enqueue_does_not_touch_the_network(brevo, make_outbox):
+    brevo.latency = 2.0
+    outbox = make_outbox()
+    start = time.perf_counter()
+    assert outbox.enqueue(PAYLOAD, "conversation-1") == "queued"
+    assert time.perf_counter() - start < 0.5
+    assert brevo.requests == 0
+    assert outbox.stats() == {"pending": 1}
+
+
+def test_drain_delivers_queued_emails(brevo, make_outbox):
+    outbox = make_outbox()
+    outbox.enqueue(PAYLOAD, "conversation-1")
+    outbox.enqueue(dict(PAYLOAD, textContent="another question"), "conversation-2")
+    assert outbox.drain_once() == 2
+    assert outbox.drain_once() == 0
+    assert [email["textContent"] for email in brevo.emails] == [PAYLOAD["textContent"], "another question"]
+    assert outbox.stats() == {"sent": 2}
+
+
+def test_repeated_enqueue_is_deduplicated(brevo, make_outbox):
+    outbox = make_outbox()
+    assert outbox.enqueue(PAYLOAD, "conversation-1") == "queued"
+    assert outbox.enqueue(PAYLOAD, "conversation-1") == "duplicate"
+    outbox.drain_once()
+    assert outbox.enqueue(PAYLOAD, "conversation-1") == "duplicate"
+    assert outbox.drain_once() == 0
+    assert len(brevo.emails) == 1
+
+
+@pytest.mark.parametrize("fault", ["error_rate", "rate_limit_rate"])
+def test_transient_failures_back_off(brevo, make_outbox, fault):
+    setattr(brevo, fault, 1.0)
+    outbox = make_outbox(base_delay=60.0)
+    outbox.enqueue(PAYLOAD, "conversation-1")
+    assert outbox.drain_once() == 1
+    assert outbox.stats() == {"pending": 1}
+    # Not due again until its backoff has passed
+    assert outbox.drain_once() == 0
+    assert brevo.requests == 1
+
+
+@pytest.mark.parametrize("fault", ["error_rate", "rate_limit_rate"])
+def test_transient_failures_are_retried(brevo, make_outbox, fault):
+    setattr(brevo, fault, 1.0)
+    outbox = make_outbox(base_delay=0.0)
+    outbox.enqueue(PAYLOAD, "conversation-1")
+    outbox.drain_once()
+    setattr(brevo, fault, 0.0)
+    assert outbox.drain_once() == 1
+    assert outbox.stats() == {"sent": 1}
+    assert len(brevo.emails) == 1
+
+
+def test_gives_up_after_max_attempts(brevo, make_outbox):
+    brevo.error_rate = 1.0
+    outbox = make_outbox(base_delay=0.0, max_attempts=3)
+    outbox.enqueue(PAYLOAD, "conversation-1")
+    for _ in range(5):
+        outbox.drain_once()
+    assert brevo.requests == 3
+    assert outbox.stats() == {"failed": 1}
+
+
+def test_client_errors_fail_permanently(brevo, make_outbox):
+    outbox = make_outbox(base_delay=0.0)
+    make_outbox.headers["api-key"] = "wrong-key"
+    outbox.enqueue(PAYLOAD, "conversation-1")
+    outbox.drain_once()
+    outbox.drain_once()
+    assert brevo.requests == 1
+    assert outbox.stats() == {"failed": 1}
+
+
+def test_failed_emails_can_be_requeued(brevo, make_outbox):
+    outbox = make_outbox()
+    make_outbox.headers["api-key"] = "wrong-key"
+    outbox.enqueue(PAYLOAD, "conversation-1")
+    outbox.drain_once()
+    assert outbox.stats() == {"failed": 1}
+
+    make_outbox.headers["api-key"] = API_KEY
+    assert outbox.enqueue(PAYLOAD, "conversation-1") == "requeued"
+    assert outbox.drain_once() == 1
+    assert outbox.stats() == {"sent": 1}
+    assert len(brevo.emails) == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from prompt_builder import NO_CONTEXT, PromptBuilder, TokenCounter
+
+SYSTEM_PROMPT = "You are a helpful assistant for Adigy users. Answer concisely."
+SNIPPETS = [
+    "Adigy costs $249/month, plus a 3.3% fee on ad spend over $2,000. " * 3,
+    "No free trial exists for Adigy, but a 30-day money-back guarantee applies.",
+    "Set monthly budgets per marketplace in the Marketplace and Budget section.",
+]
+
+
+def conversation(turns):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question number {i} about budgets and campaigns"})
+        history.append({"role": "assistant", "content": f"answer number {i} with some detail about the dashboard"})
+    return history
+
+
+@pytest.fixture
+def counter():
+    return TokenCounter()
+
+
+@pytest.mark.parametrize("budget", [120, 300, 2048])
+def test_prompt_fits_the_budget(counter, budget):
+    builder = PromptBuilder(SYSTEM_PROMPT, budget=budget, counter=counter)
+    prompt = builder.build("how much does it cost " * 20, SNIPPETS, conversation(20))
+    assert counter.count(prompt) <= budget
+    assert prompt.endswith("\nAssistant:")
+
+
+def test_top_snippet_is_trimmed_rather_than_dropped(counter):
+    builder = PromptBuilder(SYSTEM_PROMPT, budget=150, counter=counter)
+    prompt = builder.build("how much does it cost", SNIPPETS)
+    assert "Adigy costs $249/month" in prompt
+    assert "…" in prompt
+    assert "money-back guarantee" not in prompt
+
+
+def test_no_snippets_falls_back_to_no_context(counter):
+    prompt = PromptBuilder(SYSTEM_PROMPT, counter=counter).build("what is the weather", [])
+    assert NO_CONTEXT in prompt
+
+
+def test_prefix_is_identical_across_requests(counter):
+    builder = PromptBuilder(SYSTEM_PROMPT, budget=300, counter=counter)
+    prompts = [
+        builder.build("how much does it cost", SNIPPETS),
+        builder.build("is there a free trial", SNIPPETS[1:], conversation(3)),
+        builder.build("x" * 5000, [], conversation(30)),
+    ]
+    assert all(prompt.startswith(builder.prefix) for prompt in prompts)
+    assert builder.prefix.startswith(SYSTEM_PROMPT)
+
+
+def test_recent_turns_are_kept_verbatim(counter):
+    builder = PromptBuilder(SYSTEM_PROMPT, budget=2048, counter=counter, max_turns=4)
+    prompt = builder.build("next question", SNIPPETS, conversation(5))
+    assert "User: question number 4 about budgets and campaigns\n" in prompt
+    assert "Assistant: answer number 3 with some detail about the dashboard\n" in prompt
+    assert "User: question number 2" not in prompt
+
+
+def test_tight_budget_summarizes_the_most_recent_older_questions(counter):
+    builder = PromptBuilder(SYSTEM_PROMPT, budget=400, counter=counter)
+    prompt = builder.build("next question", SNIPPETS, conversation(20))
+    summary = next(line for line in prompt.splitlines() if line.startswith("Earlier, the user asked: "))
+    # The questions just before the verbatim turns survive; the oldest are dropped
+    assert "question number 16" in summary
+    assert "question number 0 " not in summary
+    assert "question number 9 " not in summary
+    numbers = [int(part.split()[2]) for part in summary[len("Earlier, the user asked: "):].split("; ")]
+    assert numbers == sorted(numbers)
@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+from response_cache import ResponseCache, SqliteCacheBackend
+
+
+def row_count(backend):
+    return backend._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def test_disk_rows_are_capped(tmp_path):
+    backend = SqliteCacheBackend(str(tmp_path / "cache.db"), max_rows=50, prune_every=10)
+    cache = ResponseCache(maxsize=5, backend=backend)
+    for i in range(200):
+        cache.set(f"key-{i}", f"answer {i}")
+    assert row_count(backend) <= 50 + 10
+    # The newest answers survive and still load from disk after leaving memory
+    assert cache.get("key-190") == "answer 190"
+    assert backend.get("key-0") is None
+
+
+def test_expired_rows_are_deleted_without_being_read(tmp_path):
+    backend = SqliteCacheBackend(str(tmp_path / "cache.db"), prune_every=5)
+    for i in range(4):
+        backend.set(f"stale-{i}", "old answer", time.time() - 1)
+    backend.set("fresh", "new answer", time.time() + 60)
+    assert row_count(backend) == 1
+    assert backend.get("fresh")[0] == "new answer"
+
+
+def test_expired_rows_are_deleted_on_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    backend = SqliteCacheBackend(path)
+    backend.set("stale", "old answer", time.time() - 1)
+    backend._conn.close()
+    assert row_count(SqliteCacheBackend(path)) == 0
+
+
+class BrokenBackend:
+    def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    def set(self, key, value, expires_at):
+        raise sqlite3.OperationalError("database is locked")
+
+    def delete(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+
+def test_backend_errors_are_treated_as_misses():
+    cache = ResponseCache(backend=BrokenBackend())
+    assert cache.get("key") is None
+    cache.set("key", "answer")
+    assert cache.get("key") == "answer"
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from assistant import ResponseCleaner, clean_response
+
+TEXTS = [
+    "Conversation History (if any):\nUser: hi\nAssistant: The answer is 42.",
+    "Below is the relevant information for the user’s query:\nAdigy costs $249/month.\n\n"
+    "Conversation History (if any):\nUser: how much?\nAssistant: It is $249 per month.",
+    "Latest User Query: what does it cost?\nAssistant: Adigy costs $249/month, plus a fee on high ad spend.",
+    "Assistant: Pause the book from its detail page.",
+    "Adigy adjusts bids daily.\n\n- Pause any book\n- Set budgets per marketplace",
+    "  Leading spaces are dropped, and so is trailing space.  \n",
+]
+
+
+def stream(text, sizes):
+    cleaner = ResponseCleaner()
+    parts, position = [], 0
+    for size in sizes:
+        parts.append(cleaner.feed(text[position:position + size]))
+        position += size
+        if position >= len(text):
+            break
+    parts.append(cleaner.flush())
+    return parts
+
+
+def random_sizes(rng, low=1, high=5):
+    while True:
+        yield rng.randint(low, high)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("seed", range(20))
+def test_streaming_matches_clean_response(text, seed):
+    parts = stream(text, random_sizes(random.Random(seed)))
+    assert "".join(parts).strip() == clean_response(text)
+
+
+def test_echoed_turns_are_never_shown():
+    text = TEXTS[0]
+    shown = ""
+    for part in stream(text, random_sizes(random.Random(0))):
+        shown += part
+        assert "User:" not in shown
+
+
+def test_marker_split_across_chunks():
+    cleaner = ResponseCleaner()
+    assert cleaner.feed("Latest User Query: hi\nAssis") == ""
+    assert cleaner.feed("tant: Hel") == "Hel"
+    assert cleaner.feed("lo") == "lo"
+    assert cleaner.flush() == ""
+
+
+def test_plain_answer_streams_as_it_arrives():
+    cleaner = ResponseCleaner()
+    assert cleaner.feed("Adigy costs ") == "Adigy costs"
+    assert cleaner.feed("$249 a month.") == " $249 a month."
+    assert cleaner.flush() == ""
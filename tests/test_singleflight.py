@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class Boom(Exception):
+    pass
+
+
+def in_thread(fn):
+    # Runs fn on a thread and returns a function that joins it and returns or raises its outcome
+    outcome = {}
+
+    def run():
+        try:
+            outcome["value"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    def join():
+        thread.join(5)
+        assert not thread.is_alive(), "thread did not finish"
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["value"]
+
+    return join
+
+
+def wait_until(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def wait_for_followers(group, count):
+    wait_until(lambda: group.stats()["coalesced"] >= count)
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    leader = in_thread(lambda: group.do("key", fetch))
+    followers = [in_thread(lambda: group.do("key", fetch)) for _ in range(3)]
+    wait_for_followers(group, 3)
+    release.set()
+    assert leader() == "answer"
+    assert [follower() for follower in followers] == ["answer"] * 3
+    assert len(calls) == 1
+    assert group.stats() == {"leaders": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_leader_error_reaches_blocking_followers():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise Boom("upstream failed")
+
+    leader = in_thread(lambda: group.do("key", fetch))
+    follower = in_thread(lambda: group.do("key", fetch))
+    wait_for_followers(group, 1)
+    release.set()
+    with pytest.raises(Boom):
+        leader()
+    with pytest.raises(Boom):
+        follower()
+    # The failed flight is gone, so the next caller tries again
+    assert group.do("key", lambda: "retried") == "retried"
+
+
+def test_leader_error_reaches_streaming_followers():
+    group = SingleFlight()
+    flight, leader = group.begin("key")
+    assert leader
+    flight.publish("partial ")
+    follower_flight, follower_is_leader = group.begin("key")
+    assert follower_flight is flight and not follower_is_leader
+    chunks = []
+    follower = in_thread(lambda: chunks.extend(flight.stream()))
+    group.finish("key", flight, error=Boom("stream broke"))
+    with pytest.raises(Boom):
+        follower()
+    assert chunks == ["partial "]
+
+
+def test_late_joiner_replays_published_chunks():
+    group = SingleFlight()
+    flight, _ = group.begin("key")
+    flight.publish("one ")
+    flight.publish("two ")
+    joined, leader = group.begin("key")
+    assert not leader
+    follower = in_thread(lambda: "".join(joined.stream()))
+    flight.publish("three")
+    group.finish("key", flight, result="one two three")
+    assert follower() == "one two three"
+
+
+def test_follower_of_non_streaming_leader_gets_the_result():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return "whole answer"
+
+    leader = in_thread(lambda: group.do("key", fetch))
+    wait_until(lambda: group.stats()["in_flight"])
+    flight, is_leader = group.begin("key")
+    assert not is_leader
+    follower = in_thread(lambda: list(flight.stream()))
+    release.set()
+    assert leader() == "whole answer"
+    assert follower() == ["whole answer"]
+
+
+def test_wait_times_out():
+    group = SingleFlight()
+    flight, _ = group.begin("key")
+    with pytest.raises(TimeoutError):
+        flight.wait(timeout=0.05)
@@ -0,0 +1,41 @@
+"""Precompute the FAQ embedding matrix that the app memory-maps at startup.
+
+    python tools/build_faq_vectors.py                  # hashed n-gram vectors
+    python tools/build_faq_vectors.py --embedder sentence-transformers/all-MiniLM-L6-v2
+
+Writes <faq>_vectors.npy (float32, one row per entry) and <faq>_vectors.json
+(keys, embedder name and a checksum of the FAQ they were built from).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from faq_vectors import VectorIndex, faq_checksum, get_embedder  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--faq", default="faq_data.json")
+    parser.add_argument("--out", help="output prefix (default: <faq>_vectors)")
+    parser.add_argument("--embedder", default=os.getenv("FAQ_EMBEDDER"),
+                        help="sentence-transformers model name, or hashing-<dim> (default)")
+    args = parser.parse_args()
+
+    with open(args.faq, "r") as f:
+        faq_data = {key.lower().strip(): value.strip() for key, value in json.load(f).items()}
+    prefix = args.out or os.path.splitext(args.faq)[0] + "_vectors"
+
+    start = time.perf_counter()
+    index = VectorIndex.build(faq_data, get_embedder(args.embedder))
+    index.save(prefix, faq_checksum(faq_data))
+    elapsed = time.perf_counter() - start
+    print(f"Embedded {len(index.keys)} entries with {index.embedder.name} into {prefix}.npy "
+          f"({index.matrix.nbytes / 1024:.1f} KiB) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
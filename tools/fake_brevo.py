@@ -0,0 +1,112 @@
+"""Local stand-in for the Brevo transactional email endpoint.
+
+Run it and point the app at it:
+
+    python tools/fake_brevo.py --port 8025 --error-rate 0.2
+    BREVO_URL=http://127.0.0.1:8025/v3/smtp/email BREVO_API_KEY=test streamlit run app.py
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeBrevoServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, api_key=None):
+        super().__init__(address, FakeBrevoHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.api_key = api_key
+        self.emails = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on 429s and abandoned streams; that's expected, not a server fault
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v3/smtp/email"
+
+
+class FakeBrevoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.api_key and self.headers.get("api-key") != server.api_key:
+            return self._reply(401, {"code": "unauthorized", "message": "Key not found"})
+        roll = random.random()
+        if roll < server.rate_limit_rate:
+            return self._reply(429, {"code": "too_many_requests"}, {"Retry-After": "1"})
+        if roll < server.rate_limit_rate + server.error_rate:
+            return self._reply(500, {"code": "internal_error"})
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, {"code": "bad_request", "message": "Invalid JSON"})
+        if not payload.get("to") or not (payload.get("textContent") or payload.get("htmlContent")):
+            return self._reply(400, {"code": "missing_parameter"})
+
+        with server.lock:
+            server.emails.append(payload)
+            message_id = f"<fake-{len(server.emails)}@brevo.local>"
+        self._reply(201, {"messageId": message_id})
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_brevo(host="127.0.0.1", port=0, **options):
+    server = FakeBrevoServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-brevo", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--api-key", help="reject requests without this api-key header")
+    args = parser.parse_args()
+
+    server = FakeBrevoServer((args.host, args.port), latency=args.latency, error_rate=args.error_rate,
+                             rate_limit_rate=args.rate_limit_rate, api_key=args.api_key)
+    print(f"Fake Brevo listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Received {server.requests} requests, accepted {len(server.emails)} emails")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Local stand-in for the Hugging Face text-generation endpoint.
+
+Speaks the same request and response shapes as MODEL_URL, both the plain JSON
+reply and the server-sent token stream, with configurable latency and faults:
+
+    python tools/fake_inference.py --port 8080 --latency 0.5 --rate-limit-rate 0.1
+    MODEL_URL=http://127.0.0.1:8080/ HUGGINGFACE_API_KEY=test streamlit run app.py
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "Adigy adjusts your bids, targets and budgets automatically based on recent performance. "
+    "Most publishers see stable results within a few weeks, and you can pause any book or "
+    "marketplace from the dashboard at any time."
+)
+
+
+class FakeInferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, latency=0.2, token_delay=0.01, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=0.2, answer=ANSWER):
+        super().__init__(address, FakeInferenceHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.answer = answer
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on 429s and abandoned streams; that's expected, not a server fault
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/"
+
+
+class FakeInferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+
+        roll = random.random()
+        if roll < server.rate_limit_rate:
+            with server.lock:
+                server.rate_limited += 1
+            return self._json(429, {"error": "Rate limit reached"}, {"Retry-After": f"{server.retry_after:g}"})
+        if roll < server.rate_limit_rate + server.error_rate:
+            with server.lock:
+                server.errors += 1
+            return self._json(503, {"error": "Model is currently loading"})
+
+        # Time to first token; the rest of the answer arrives token by token
+        time.sleep(server.latency)
+        parameters = body.get("parameters", {})
+        words = server.answer.split(" ")[:parameters.get("max_new_tokens", 500)]
+        tokens = [word if i == 0 else " " + word for i, word in enumerate(words)]
+        if body.get("stream"):
+            return self._stream(tokens)
+        time.sleep(server.token_delay * len(tokens))
+        text = "".join(tokens)
+        if parameters.get("return_full_text", True):
+            text = body.get("inputs", "") + " " + text
+        self._json(200, [{"generated_text": text}])
+
+    def _stream(self, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            last = i == len(tokens) - 1
+            event = {
+                "token": {"id": i, "text": token, "logprob": -0.1, "special": False},
+                "generated_text": "".join(tokens) if last else None,
+                "details": None,
+            }
+            self._chunk(f"data:{json.dumps(event)}\n\n".encode("utf-8"))
+            time.sleep(self.server.token_delay)
+        self._chunk(b"")
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_inference(host="127.0.0.1", port=0, **options):
+    server = FakeInferenceServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-inference", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    server = FakeInferenceServer((args.host, args.port), latency=args.latency, token_delay=args.token_delay,
+                                 error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                 retry_after=args.retry_after)
+    print(f"Fake inference endpoint listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Served {server.requests} requests ({server.rate_limited} rate limited, {server.errors} errors)")
+
+
+if __name__ == "__main__":
+    main()